@@ -1,25 +1,145 @@
 # app.py
 # Interfaz web Flask. Solo rutas — la lógica de generación está en generate.py.
 
-from flask import Flask, render_template, jsonify, send_file, Response, request, redirect, url_for
+from flask import Flask, render_template, jsonify, send_file, Response, request, redirect, url_for, make_response
 from pathlib import Path
-import io
+import argparse
+import functools
+import hmac
 import json
+import sys
+import time
 import requests as req
-from config import NOCODB_URL, API_TOKEN, TABLE_CONFIG, DOCUMENTS
-from nocodb_client import get_table, get_characters, get_character, get_bestiary_entries, get_bestiary_entry, _get_record
-from generate import find_doc, doc_type, render_html, render_pdf, render_docx, resolve_view_name, output_filename
-from utils import check_environment
+from config import (NOCODB_URL, API_TOKEN, TABLE_CONFIG, DOCUMENTS, PROFILE_ENABLED, PROFILES_DIR,
+                    WEBHOOK_SECRET, WEBHOOK_PRERENDER)
+from nocodb_client import (get_table, get_characters, get_character, get_bestiary_entries, get_bestiary_entry,
+                           get_attachments, _get_record, invalidate_table, reset_stale, stale_since, table_keys_for)
+from generate import (find_doc, doc_type, render_html, render_pdf, render_docx, resolve_view_name, output_filename,
+                      preload_templates, document_version, invalidate_outputs, queue_prerender,
+                      begin_request_versions, end_request_versions,
+                      public_views, pdf_file, docx_file, views_file, render_preview, render_slice)
+from utils import check_environment, wait_for_fonts
+import bestiary_stats
+import assets
+import images
+import metrics
+from profiling import run_profiled, save_profile
 
 check_environment()
 
 app = Flask(__name__)
+assets.init_app(app)
+images.init_app(app)
 
 TEMPLATES_DIR = Path(__file__).parent / "templates"
 
 
+# ── MÉTRICAS ───────────────────────────────────────────────────────────────
+# Las rutas de render se miden por etapas (ver metrics.py): la respuesta lleva
+# la cabecera Server-Timing y los tiempos se acumulan para /api/metrics.
+
+TIMED_ENDPOINTS = {"preview", "preview_slice", "download_html", "download_pdf", "download_docx", "download_views",
+                   "preview_characters", "download_characters_pdf"}
+
+
+@app.before_request
+def _start_timing():
+    reset_stale()
+    begin_request_versions()
+    if request.endpoint in TIMED_ENDPOINTS:
+        metrics.begin()
+
+
+@app.after_request
+def _finish_timing(response):
+    timings = metrics.current()
+    if timings is not None:
+        response.headers["Server-Timing"] = timings.server_timing()
+        metrics.end(timings, request.endpoint)
+    return response
+
+
+@app.teardown_request
+def _end_request(_error):
+    end_request_versions()
+
+
+@app.context_processor
+def _stale_context():
+    # Aviso en la cabecera de la UI si se muestran datos antiguos (ver nocodb_client.py)
+    return {"stale_since": stale_since()}
+
+
+@app.route("/api/metrics")
+def metrics_endpoint():
+    return Response(metrics.prometheus_text(), mimetype="text/plain; version=0.0.4")
+
+
+# ── PERFILADO ──────────────────────────────────────────────────────────────
+# ?profile=1 ejecuta el render bajo cProfile y devuelve el informe en texto en
+# lugar del documento. Solo si el servidor arrancó con SAVAGEPY_PROFILE=1.
+
+def _profile_requested() -> bool:
+    return PROFILE_ENABLED and request.args.get("profile") == "1"
+
+
+def _profile_response(render, doc_id: str, fmt: str, view_id: str | None) -> Response:
+    _, profiler = run_profiled(render, doc_id, view_id=view_id)
+    path = Path(PROFILES_DIR) / f"{output_filename(doc_id, fmt)}.{time.strftime('%Y%m%d-%H%M%S')}"
+    text = save_profile(profiler, path)
+    return Response(text, mimetype="text/plain", headers={"X-Profile-Path": f"{path}.prof"})
+
+
+# ── CACHÉ HTTP ─────────────────────────────────────────────────────────────
+# Los documentos generados llevan un ETag fuerte (template + versión de los datos)
+# y Last-Modified. Si el cliente ya tiene esa versión se responde 304 sin renderizar;
+# la comprobación cuesta una sola petición ligera a NocoDB.
+
+def conditional(fmt: str):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(doc_id: str, *args, **kwargs):
+            if _profile_requested():
+                return view(doc_id, *args, **kwargs)
+            version = document_version(doc_id, fmt, request.args.get("view_id") or None)
+            if version is None:
+                return view(doc_id, *args, **kwargs)
+            etag, last_modified = version
+            if request.if_none_match:
+                fresh = request.if_none_match.contains(etag)
+            else:
+                fresh = bool(request.if_modified_since and last_modified
+                             and last_modified.replace(microsecond=0) <= request.if_modified_since)
+            if fresh:
+                response = Response(status=304)
+            else:
+                response = make_response(view(doc_id, *args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+
 # ── DOCUMENTOS ─────────────────────────────────────────────────────────────
 
+DOCX_MIMETYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def _send_generated(file, mimetype: str, download_name: str, inline: bool = False) -> Response:
+    """Envía un documento generado desde disco (wsgi.file_wrapper / sendfile, Range).
+    inline=True: para abrirlo en el visor del navegador en lugar de descargarlo."""
+    response = send_file(file.path, mimetype=mimetype, as_attachment=not inline,
+                         download_name=download_name, etag=file.etag or False)
+    file.discard()      # send_file ya lo ha abierto
+    return response
+
+
 @app.route("/")
 def index():
     return render_template("ui/index.html", documents=DOCUMENTS)
@@ -45,33 +165,44 @@ def get_views(table_key: str):
     if table_key not in TABLE_CONFIG:
         return jsonify({"error": "Tabla no encontrada"}), 404
     try:
-        r = req.get(f"{NOCODB_URL}/api/v2/meta/tables/{TABLE_CONFIG[table_key]['table_id']}/views",
-                    headers={"xc-token": API_TOKEN}, timeout=5)
-        r.raise_for_status()
-        PREFIX = "pub:"
-        views = [
-            {"id": v["id"], "title": v["title"].removeprefix(PREFIX).strip()}
-            for v in r.json().get("list", [])
-            if v["title"].startswith(PREFIX)
-        ]
-        return jsonify(views)
+        return jsonify(public_views(table_key))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/preview/<path:doc_id>")
+@conditional("html")
 def preview(doc_id: str):
     view_id = request.args.get("view_id") or None
     try:
-        return Response(render_html(doc_id, view_id=view_id), mimetype="text/html")
+        if _profile_requested():
+            return _profile_response(render_html, doc_id, "html", view_id)
+        return Response(render_preview(doc_id, view_id=view_id), mimetype="text/html")
+    except ValueError:
+        return "Documento no encontrado", 404
+
+
+@app.route("/preview/<path:doc_id>/slice")
+def preview_slice(doc_id: str):
+    """Registros [offset, offset + limit) de una previsualización por partes."""
+    view_id = request.args.get("view_id") or None
+    offset = request.args.get("offset", 0, type=int)
+    limit = request.args.get("limit", 0, type=int)
+    if offset < 0 or not 0 < limit <= 500:
+        return "offset/limit no válidos", 400
+    try:
+        return Response(render_slice(doc_id, view_id, offset, limit), mimetype="text/html")
     except ValueError:
         return "Documento no encontrado", 404
 
 
 @app.route("/download/<path:doc_id>/html")
+@conditional("html")
 def download_html(doc_id: str):
     view_id = request.args.get("view_id") or None
     try:
+        if _profile_requested():
+            return _profile_response(render_html, doc_id, "html", view_id)
         html = render_html(doc_id, view_id=view_id)
     except ValueError:
         return "Documento no encontrado", 404
@@ -80,6 +211,7 @@ def download_html(doc_id: str):
 
 
 @app.route("/download/<path:doc_id>/pdf")
+@conditional("pdf")
 def download_pdf(doc_id: str):
     view_id = request.args.get("view_id") or None
     doc, table_key = find_doc(doc_id)
@@ -88,15 +220,19 @@ def download_pdf(doc_id: str):
     if doc_type(doc) != "html":
         return "Este documento no tiene formato PDF", 400
     try:
-        pdf_bytes = render_pdf(doc_id, view_id=view_id)
+        if _profile_requested():
+            return _profile_response(functools.partial(render_pdf, use_cache=False), doc_id, "pdf", view_id)
+        pdf = pdf_file(doc_id, view_id=view_id)
     except Exception as e:
         return f"Error al generar PDF: {e}", 500
     view_name = resolve_view_name(table_key, view_id)
-    return send_file(io.BytesIO(pdf_bytes), mimetype="application/pdf",
-                     as_attachment=True, download_name=output_filename(doc_id, "pdf", view_name))
+    # Los PDF linealizados (móvil) se abren en el visor, que los carga por partes
+    return _send_generated(pdf, "application/pdf", output_filename(doc_id, "pdf", view_name),
+                           inline=bool(doc.get("linearize")))
 
 
 @app.route("/download/<path:doc_id>/docx")
+@conditional("docx")
 def download_docx(doc_id: str):
     view_id = request.args.get("view_id") or None
     doc, table_key = find_doc(doc_id)
@@ -105,13 +241,13 @@ def download_docx(doc_id: str):
     if doc_type(doc) not in ("docx", "md"):
         return "Este documento no tiene formato Word", 400
     try:
-        docx_bytes = render_docx(doc_id, view_id=view_id)
+        if _profile_requested():
+            return _profile_response(functools.partial(render_docx, use_cache=False), doc_id, "docx", view_id)
+        docx = docx_file(doc_id, view_id=view_id)
     except Exception as e:
         return f"Error al generar Word: {e}", 500
     view_name = resolve_view_name(table_key, view_id)
-    return send_file(io.BytesIO(docx_bytes),
-                     mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                     as_attachment=True, download_name=output_filename(doc_id, "docx", view_name))
+    return _send_generated(docx, DOCX_MIMETYPE, output_filename(doc_id, "docx", view_name))
 
 
 # ── PERSONAJES ────────────────────────────────────────────────────────────
@@ -132,25 +268,57 @@ def download_characters_pdf():
     view_id = request.args.get("view_id") or None
     doc, table_key = find_doc("character.character_sheet")
     try:
-        pdf_bytes = render_pdf("character.character_sheet", view_id=view_id)
+        pdf = pdf_file("character.character_sheet", view_id=view_id)
     except ValueError as e:
         return str(e), 404
     except Exception as e:
         return f"Error al generar PDF: {e}", 500
     view_name = resolve_view_name(table_key, view_id)
-    return send_file(io.BytesIO(pdf_bytes), mimetype="application/pdf",
-                     as_attachment=True, download_name=output_filename("character.character_sheet", "pdf", view_name))
+    return _send_generated(pdf, "application/pdf", output_filename("character.character_sheet", "pdf", view_name))
+
+
+@app.route("/download/<path:doc_id>/views/<bundle>")
+def download_views(doc_id: str, bundle: str):
+    """El documento de cada vista pública: ZIP (un archivo por vista) o PDF con un marcador por vista."""
+    doc, table_key = find_doc(doc_id)
+    if not doc:
+        return "Documento no encontrado", 404
+    if bundle not in ("zip", "pdf"):
+        return "Formato no válido (zip o pdf)", 400
+    if bundle == "pdf" and doc_type(doc) != "html":
+        return "Este documento no tiene formato PDF", 400
+    try:
+        if not public_views(table_key):
+            return "Esta tabla no tiene vistas públicas", 404
+        bundle_file = views_file(doc_id, bundle)
+    except Exception as e:
+        return f"Error al generar las vistas: {e}", 500
+    mimetype = "application/zip" if bundle == "zip" else "application/pdf"
+    return _send_generated(bundle_file, mimetype, output_filename(doc_id, bundle, "vistas"))
 
 
 # ── GESTIÓN DE PERSONAJES ─────────────────────────────────────────────────
 
+def _upload_image(table_key: str, record_id: str | None, image_file) -> dict | None:
+    """Normaliza la imagen subida (images.py) y la sube a NocoDB. Devuelve el adjunto
+    para guardarlo con el registro, o None si el registro ya tiene esa misma imagen."""
+    image = images.ingest(image_file.stream, image_file.filename, image_file.mimetype)
+    if record_id and images.already_attached(get_attachments(table_key, int(record_id)), image):
+        return None
+    upload_r = req.post(f"{NOCODB_URL}/api/v2/storage/upload", headers={"xc-token": API_TOKEN},
+                        files={"file": (image.filename, image.content, image.mimetype)})
+    upload_r.raise_for_status()
+    attachment = upload_r.json()
+    return attachment[0] if isinstance(attachment, list) else attachment
+
+
 @app.route("/characters")
 def characters_list():
     try:
-        chars = get_characters(full=True, view_id=TABLE_CONFIG["character"]["view_id"])
-    except Exception:
-        chars = []
-    return render_template("ui/characters.html", characters=chars)
+        chars, error = get_characters(full=True, view_id=TABLE_CONFIG["character"]["view_id"]), None
+    except Exception as e:
+        chars, error = [], str(e)
+    return render_template("ui/characters.html", characters=chars, nocodb_error=error)
 
 
 @app.route("/characters/new")
@@ -175,26 +343,26 @@ def character_save():
     image_file = request.files.get("image")
     cfg = TABLE_CONFIG["character"]
     headers = {"xc-token": API_TOKEN}
-    record_data = {"name": json.loads(character_json).get("name", "Sin nombre"), "data": character_json}
+    parsed = json.loads(character_json)
+    record_data = {"name": parsed.get("name", "Sin nombre"), "concept": parsed.get("concept", ""),
+                   "data": character_json}
     try:
+        if image_file and image_file.filename:
+            attachment = _upload_image("character", record_id, image_file)
+            if attachment:
+                record_data["image"] = [attachment]
         if record_id:
             record_data["Id"] = int(record_id)
             r = req.patch(f"{NOCODB_URL}/api/v2/tables/{cfg['table_id']}/records", headers=headers, json=record_data)
         else:
             r = req.post(f"{NOCODB_URL}/api/v2/tables/{cfg['table_id']}/records", headers=headers, json=record_data)
         r.raise_for_status()
-        saved_id = int(record_id) if record_id else (r.json()[0].get("Id") if isinstance(r.json(), list) else r.json().get("Id"))
-        if image_file and image_file.filename:
-            upload_r = req.post(f"{NOCODB_URL}/api/v2/storage/upload", headers={"xc-token": API_TOKEN},
-                                files={"file": (image_file.filename, image_file.stream, image_file.mimetype)})
-            upload_r.raise_for_status()
-            attachment = upload_r.json()
-            if isinstance(attachment, list):
-                attachment = attachment[0]
-            req.patch(f"{NOCODB_URL}/api/v2/tables/{cfg['table_id']}/records",
-                      headers=headers, json={"Id": saved_id, "image": [attachment]})
+    except ValueError as e:
+        return str(e), 400
     except Exception as e:
         return f"Error al guardar: {e}", 500
+    finally:
+        invalidate_table("character")
     return redirect(url_for("characters_list"))
 
 
@@ -207,6 +375,8 @@ def character_delete(record_id: int):
         r.raise_for_status()
     except Exception as e:
         return f"Error al eliminar: {e}", 500
+    finally:
+        invalidate_table("character")
     return redirect(url_for("characters_list"))
 
 
@@ -229,10 +399,10 @@ def form_data():
 @app.route("/bestiary")
 def bestiary_list():
     try:
-        creatures = get_bestiary_entries(full=True, view_id=TABLE_CONFIG["bestiary"]["view_id"])
-    except Exception:
-        creatures = []
-    return render_template("ui/bestiary.html", creatures=creatures)
+        creatures, error = get_bestiary_entries(full=True, view_id=TABLE_CONFIG["bestiary"]["view_id"]), None
+    except Exception as e:
+        creatures, error = [], str(e)
+    return render_template("ui/bestiary.html", creatures=creatures, nocodb_error=error)
 
 
 @app.route("/bestiary/new")
@@ -259,26 +429,25 @@ def bestiary_save():
     headers = {"xc-token": API_TOKEN}
     parsed = json.loads(creature_json)
     record_data = {"name": parsed.get("name", "Sin nombre"), "type": parsed.get("type", ""),
-                   "concept": parsed.get("concept", ""), "data": creature_json}
+                   "concept": parsed.get("concept", ""), "wild_card": bool(parsed.get("wild_card")),
+                   "data": creature_json}
     try:
+        if image_file and image_file.filename:
+            attachment = _upload_image("bestiary", record_id, image_file)
+            if attachment:
+                record_data["image"] = [attachment]
         if record_id:
             record_data["Id"] = int(record_id)
             r = req.patch(f"{NOCODB_URL}/api/v2/tables/{cfg['table_id']}/records", headers=headers, json=record_data)
         else:
             r = req.post(f"{NOCODB_URL}/api/v2/tables/{cfg['table_id']}/records", headers=headers, json=record_data)
         r.raise_for_status()
-        saved_id = int(record_id) if record_id else (r.json()[0].get("Id") if isinstance(r.json(), list) else r.json().get("Id"))
-        if image_file and image_file.filename:
-            upload_r = req.post(f"{NOCODB_URL}/api/v2/storage/upload", headers={"xc-token": API_TOKEN},
-                                files={"file": (image_file.filename, image_file.stream, image_file.mimetype)})
-            upload_r.raise_for_status()
-            attachment = upload_r.json()
-            if isinstance(attachment, list):
-                attachment = attachment[0]
-            req.patch(f"{NOCODB_URL}/api/v2/tables/{cfg['table_id']}/records",
-                      headers=headers, json={"Id": saved_id, "image": [attachment]})
+    except ValueError as e:
+        return str(e), 400
     except Exception as e:
         return f"Error al guardar: {e}", 500
+    finally:
+        invalidate_table("bestiary")
     return redirect(url_for("bestiary_list"))
 
 
@@ -291,6 +460,8 @@ def bestiary_delete(record_id: int):
         r.raise_for_status()
     except Exception as e:
         return f"Error al eliminar: {e}", 500
+    finally:
+        invalidate_table("bestiary")
     return redirect(url_for("bestiary_list"))
 
 
@@ -307,6 +478,42 @@ def form_data_bestiary():
         return jsonify({"error": str(e)}), 500
 
 
+# Estadísticas para preparar encuentros (bestiary_stats.py, requiere NumPy)
+
+def _stats_response(query):
+    if not bestiary_stats.available():
+        return jsonify({"error": "Las estadísticas del bestiario requieren NumPy (pip install numpy)"}), 501
+    try:
+        result = query()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if result is None:
+        return jsonify({"error": "Criatura no encontrada en la vista"}), 404
+    return jsonify(result)
+
+
+@app.route("/api/bestiary/stats")
+def bestiary_stats_summary():
+    return _stats_response(lambda: bestiary_stats.summary(
+        view_id=request.args.get("view_id") or None,
+        group=request.args.get("group") or None,
+        stats=request.args.get("stats")))
+
+
+@app.route("/api/bestiary/<int:record_id>/comparable")
+def bestiary_comparable(record_id: int):
+    wild_card = request.args.get("wild_card")
+    return _stats_response(lambda: bestiary_stats.comparable(
+        record_id,
+        view_id=request.args.get("view_id") or None,
+        stats=request.args.get("stats"),
+        limit=min(max(request.args.get("limit", 10, type=int), 1), 100),
+        same_type=request.args.get("same_type") == "1",
+        wild_card=None if wild_card in (None, "") else wild_card == "1"))
+
+
 # ── GESTIÓN DE REGLAS ─────────────────────────────────────────────────────
 
 @app.route("/api/form-data/rules")
@@ -368,6 +575,8 @@ def rule_save():
             return f"Error al guardar: {r.text}", 500
     except Exception as e:
         return f"Error al guardar: {e}", 500
+    finally:
+        invalidate_table("rule")
     return redirect(url_for("rules_list"))
 
 
@@ -380,6 +589,8 @@ def rule_delete(record_id: int):
         r.raise_for_status()
     except Exception as e:
         return f"Error al eliminar: {e}", 500
+    finally:
+        invalidate_table("rule")
     return redirect(url_for("rules_list"))
 
 
@@ -398,7 +609,103 @@ def glossary():
     return render_template("ui/glossary.html", tabs=tabs, data=data)
 
 
-if __name__ == "__main__":
+# ── WEBHOOKS ──────────────────────────────────────────────────────────────
+# NocoDB avisa de los cambios hechos desde su propia interfaz (webhook de la tabla
+# apuntando a /api/webhooks/nocodb con la cabecera X-Webhook-Secret). Se descartan
+# los datos cacheados de esa tabla y de las que la enlazan, los documentos que los
+# muestran (también las fichas que referencian ventajas, poderes...) y, si
+# SAVAGEPY_WEBHOOK_PRERENDER=1, se regeneran en segundo plano para que la próxima
+# descarga ya esté lista.
+
+@app.route("/api/webhooks/nocodb", methods=["POST"])
+def nocodb_webhook():
+    if not WEBHOOK_SECRET:
+        return jsonify({"error": "Webhooks desactivados (falta SAVAGEPY_WEBHOOK_SECRET)"}), 404
+    secret = request.headers.get("X-Webhook-Secret", "")          # nunca en la URL: acaba en los logs
+    if not hmac.compare_digest(secret.encode(), WEBHOOK_SECRET.encode()):
+        return jsonify({"error": "Secreto incorrecto"}), 403
+
+    payload = request.get_json(silent=True) or {}
+    table_id = (payload.get("data") or {}).get("table_id") or payload.get("table_id")
+    table_keys = table_keys_for(table_id) if table_id else []
+    if not table_keys:
+        return jsonify({"table": None, "ignored": table_id})
+
+    doc_ids = []
+    for table_key in table_keys:
+        invalidate_table(table_key)
+        doc_ids += [doc_id for doc_id in invalidate_outputs(table_key) if doc_id not in doc_ids]
+    if WEBHOOK_PRERENDER:
+        queue_prerender(doc_ids)
+    return jsonify({"table": table_keys[0], "tables": table_keys, "documents": doc_ids,
+                    "prerender": WEBHOOK_PRERENDER})
+
+
+# ── SERVIDOR ───────────────────────────────────────────────────────────────
+
+def serve(bind: str, workers: int, threads: int, max_requests: int, timeout: int):
+    """Servidor de producción (gunicorn, solo Linux/WSL).
+
+    Los templates y las fuentes se preparan en el proceso maestro antes de crear los
+    trabajadores, que los heredan ya cargados. Los datos de NocoDB viven en la caché
+    compartida en disco (cache.py), común a todos los trabajadores. Cada trabajador se
+    recicla tras max_requests peticiones para contener el crecimiento de memoria de WeasyPrint.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("[!] Falta 'gunicorn'. Ejecuta: pip install -r requirements.txt")
+        sys.exit(1)
+
+    options = {
+        "bind":                bind,
+        "workers":             workers,
+        "threads":             threads,
+        "worker_class":        "gthread" if threads > 1 else "sync",
+        "preload_app":         True,
+        "max_requests":        max_requests,
+        "max_requests_jitter": max(1, max_requests // 10) if max_requests else 0,
+        "timeout":             timeout,
+    }
+
+    class _Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    assets.build(verbose=False)
+    preload_templates()
+    wait_for_fonts(timeout=None)
+    metrics.reset()
+    print(f"🎲 Savage Worlds Generator — {workers} trabajadores × {threads} hilos")
+    print(f"   http://{bind}")
+    _Server().run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Savage Worlds Generator")
+    sub = parser.add_subparsers(dest="command")
+    p_serve = sub.add_parser("serve", help="Servidor de producción con varios trabajadores (gunicorn)")
+    p_serve.add_argument("--bind", default="0.0.0.0:5000", help="Dirección:puerto (por defecto 0.0.0.0:5000)")
+    p_serve.add_argument("--workers", type=int, default=2, help="Procesos trabajadores (por defecto 2)")
+    p_serve.add_argument("--threads", type=int, default=4, help="Hilos por trabajador (por defecto 4)")
+    p_serve.add_argument("--max-requests", type=int, default=200,
+                         help="Reciclar cada trabajador tras N peticiones, 0 = nunca (por defecto 200)")
+    p_serve.add_argument("--timeout", type=int, default=180, help="Segundos máximos por petición (por defecto 180)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.bind, args.workers, args.threads, args.max_requests, args.timeout)
+        return
+
+    metrics.reset()
     print("🎲 Savage Worlds Generator")
     print("   http://localhost:5000")
     app.run(debug=True, port=5000)
+
+
+if __name__ == "__main__":
+    main()
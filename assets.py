@@ -0,0 +1,242 @@
+# assets.py
+# Recursos estáticos para producción: nombres con hash de contenido, copias
+# precomprimidas (.br/.gz) y variantes WebP/AVIF redimensionadas de las imágenes.
+#
+# Compilar (se hace también al arrancar `python app.py serve`):
+#   python assets.py
+#
+# Los templates usan asset_url('ui.css') y asset_sources('images/book01.jpg'):
+# con static/dist/manifest.json apuntan a /assets/<nombre con hash> (caché inmutable
+# de un año); sin compilar, o con el servidor de desarrollo (debug), siguen sirviendo
+# /static/ como siempre.
+
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import re
+from pathlib import Path
+
+from flask import current_app, has_app_context, request, send_from_directory
+
+from cache import file_version
+
+BASE_DIR      = Path(__file__).parent
+STATIC_DIR    = BASE_DIR / "static"
+DIST_DIR      = STATIC_DIR / "dist"
+MANIFEST_PATH = DIST_DIR / "manifest.json"
+ASSETS_PREFIX = "/assets/"
+
+SKIP_DIRS         = {"dist", "cache"}                 # static/dist, static/fonts/cache
+COMPRESSIBLE      = {".css", ".js", ".svg", ".json", ".ico"}
+IMAGE_EXTS        = {".jpg", ".jpeg", ".png"}
+MAX_IMAGE_WIDTH   = 2400                              # el original se reescala si es mayor
+JPEG_QUALITY      = 82
+RESPONSIVE_WIDTHS = (96, 192, 480, 960, 1600)         # solo las menores que el original
+MODERN_FORMATS    = {"avif": ("AVIF", "image/avif", 55), "webp": ("WEBP", "image/webp", 80)}
+CACHE_SECONDS     = 365 * 24 * 3600
+
+_CSS_URL = re.compile(r"""url\((['"]?)/static/([^'")?#]+)\1\)""")
+
+
+# ── COMPILACIÓN ────────────────────────────────────────────────────────────
+
+def _hashed_name(rel: str, content: bytes) -> str:
+    p = Path(rel)
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    return str(p.with_name(f"{p.stem}.{digest}{p.suffix}").as_posix())
+
+
+def _write(rel: str, content: bytes):
+    path = DIST_DIR / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+def _compress(rel: str, content: bytes):
+    _write(rel + ".gz", gzip.compress(content, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    _write(rel + ".br", brotli.compress(content, quality=11))
+
+
+def _optimize_image(content: bytes, suffix: str) -> tuple[bytes, list[tuple[str, int, bytes]]]:
+    """Devuelve (original optimizado, [(formato, ancho, bytes)...]). Sin Pillow, no toca nada."""
+    try:
+        from PIL import Image, ImageOps, features
+    except ImportError:
+        return content, []
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(content)))
+    if img.width > MAX_IMAGE_WIDTH:
+        img = img.resize((MAX_IMAGE_WIDTH, round(img.height * MAX_IMAGE_WIDTH / img.width)), Image.LANCZOS)
+
+    out = io.BytesIO()
+    if suffix in (".jpg", ".jpeg"):
+        img.convert("RGB").save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        img.save(out, "PNG", optimize=True)
+    optimized = out.getvalue() if out.tell() < len(content) else content
+
+    variants = []
+    widths = [w for w in RESPONSIVE_WIDTHS if w < img.width] + [img.width]
+    for fmt, (pil_format, _, quality) in MODERN_FORMATS.items():
+        if not features.check(fmt):
+            continue
+        for width in widths:
+            resized = img if width == img.width else img.resize(
+                (width, round(img.height * width / img.width)), Image.LANCZOS)
+            buf = io.BytesIO()
+            resized.save(buf, pil_format, quality=quality)
+            variants.append((fmt, width, buf.getvalue()))
+    return optimized, variants
+
+
+def build(verbose: bool = True) -> dict:
+    """Compila static/ en static/dist/. Las imágenes sin cambios reutilizan la compilación anterior."""
+    previous = _read_manifest() or {}
+    manifest = {"files": {}, "variants": {}, "sources": {}}
+    sources = sorted(p for p in STATIC_DIR.rglob("*")
+                     if p.is_file() and not SKIP_DIRS.intersection(p.relative_to(STATIC_DIR).parts))
+    css_files = []
+
+    for path in sources:
+        rel = path.relative_to(STATIC_DIR).as_posix()
+        if path.suffix == ".css":
+            css_files.append((rel, path))
+            continue
+        content = path.read_bytes()
+        source_hash = hashlib.sha256(content).hexdigest()
+        manifest["sources"][rel] = source_hash
+        old_file = previous.get("files", {}).get(rel)
+        if previous.get("sources", {}).get(rel) == source_hash and old_file and (DIST_DIR / old_file).exists():
+            manifest["files"][rel] = old_file
+            if rel in previous.get("variants", {}):
+                manifest["variants"][rel] = previous["variants"][rel]
+            continue
+
+        variants = []
+        if path.suffix.lower() in IMAGE_EXTS:
+            content, variants = _optimize_image(content, path.suffix.lower())
+        hashed = _hashed_name(rel, content)
+        _write(hashed, content)
+        if path.suffix in COMPRESSIBLE:
+            _compress(hashed, content)
+        manifest["files"][rel] = hashed
+        if variants:
+            entries = []
+            for fmt, width, data in variants:
+                variant_rel = str(Path(rel).with_name(f"{Path(rel).stem}-{width}w.{fmt}").as_posix())
+                variant_hashed = _hashed_name(variant_rel, data)
+                _write(variant_hashed, data)
+                entries.append({"file": variant_hashed, "width": width, "type": MODERN_FORMATS[fmt][1]})
+            manifest["variants"][rel] = entries
+        if verbose:
+            print(f"  [✓] {rel} → {hashed}" + (f" (+{len(variants)} variantes)" if variants else ""))
+
+    # Los CSS al final: sus url('/static/...') apuntan a los nombres con hash
+    for rel, path in css_files:
+        css = path.read_text(encoding="utf-8")
+        css = _CSS_URL.sub(lambda m: f"url({m.group(1)}{_url_for_manifest(manifest, m.group(2))}{m.group(1)})", css)
+        content = css.encode("utf-8")
+        hashed = _hashed_name(rel, content)
+        _write(hashed, content)
+        _compress(hashed, content)
+        manifest["files"][rel] = hashed
+        manifest["sources"][rel] = hashlib.sha256(content).hexdigest()
+        if verbose:
+            print(f"  [✓] {rel} → {hashed}")
+
+    DIST_DIR.mkdir(parents=True, exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    _prune(manifest)
+    return manifest
+
+
+def _prune(manifest: dict):
+    """Borra de static/dist/ lo que ya no está en el manifiesto."""
+    keep = {"manifest.json"}
+    for rel in manifest["files"].values():
+        keep.update({rel, rel + ".gz", rel + ".br"})
+    for entries in manifest["variants"].values():
+        keep.update(e["file"] for e in entries)
+    for path in DIST_DIR.rglob("*"):
+        if path.is_file() and path.relative_to(DIST_DIR).as_posix() not in keep:
+            path.unlink()
+
+
+# ── SERVIDO ────────────────────────────────────────────────────────────────
+
+_manifest: dict | None = None
+_manifest_version = None
+
+
+def _read_manifest() -> dict | None:
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _current_manifest() -> dict:
+    """Manifiesto en memoria; se relee si el archivo cambia (p.ej. tras recompilar).
+    En modo debug se ignora, para que los cambios en static/ se vean sin recompilar."""
+    global _manifest, _manifest_version
+    if has_app_context() and current_app.debug:
+        return {}
+    version = file_version(MANIFEST_PATH)
+    if version != _manifest_version:
+        _manifest, _manifest_version = _read_manifest() or {}, version
+    return _manifest
+
+
+def _url_for_manifest(manifest: dict, rel: str) -> str:
+    hashed = manifest.get("files", {}).get(rel)
+    return f"{ASSETS_PREFIX}{hashed}" if hashed else f"/static/{rel}"
+
+
+def asset_url(rel: str) -> str:
+    """URL de un recurso de static/: con hash si está compilado, /static/ si no."""
+    return _url_for_manifest(_current_manifest(), rel)
+
+
+def asset_sources(rel: str) -> list[tuple[str, str]]:
+    """[(mime, srcset)] de las variantes modernas de una imagen, de más a menos eficiente."""
+    by_type: dict[str, list[str]] = {}
+    for entry in _current_manifest().get("variants", {}).get(rel, []):
+        by_type.setdefault(entry["type"], []).append(f"{ASSETS_PREFIX}{entry['file']} {entry['width']}w")
+    order = [mime for _, mime, _ in MODERN_FORMATS.values()]
+    return [(mime, ", ".join(by_type[mime])) for mime in order if mime in by_type]
+
+
+def serve_asset(filename: str):
+    """Sirve static/dist/<filename> con caché inmutable y la copia .br/.gz si el cliente la acepta."""
+    encodings = request.accept_encodings
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if encodings[encoding] and (DIST_DIR / (filename + suffix)).is_file():
+            response = send_from_directory(DIST_DIR, filename + suffix, mimetype=mimetype,
+                                           max_age=CACHE_SECONDS, conditional=True)
+            response.headers["Content-Encoding"] = encoding
+            break
+    else:
+        response = send_from_directory(DIST_DIR, filename, mimetype=mimetype,
+                                       max_age=CACHE_SECONDS, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def init_app(app):
+    """Registra /assets/ y las funciones asset_url / asset_sources en los templates."""
+    app.add_url_rule(f"{ASSETS_PREFIX}<path:filename>", "assets", serve_asset)
+    app.jinja_env.globals.update(asset_url=asset_url, asset_sources=asset_sources)
+
+
+if __name__ == "__main__":
+    print("Compilando recursos estáticos…")
+    result = build()
+    print(f"[OK] {len(result['files'])} archivos en {DIST_DIR}")
@@ -0,0 +1,2 @@
+# benchmarks/
+# Banco de pruebas de rendimiento contra un NocoDB falso local (ver README.md, sección Rendimiento).
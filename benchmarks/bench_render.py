@@ -0,0 +1,180 @@
+# benchmarks/bench_render.py
+# Mide get_table y render_html/render_pdf/render_docx de cada documento de DOCUMENTS
+# contra un NocoDB falso local, a varios tamaños de tabla, y compara con una línea base.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m benchmarks.bench_render                              # 10/100/1000 filas
+#   python -m benchmarks.bench_render --rows 100 --latency 0.005 --repeat 5
+#   python -m benchmarks.bench_render --docs power.cards_mobile --formats pdf
+#   python -m benchmarks.bench_render --save-baseline              # guarda benchmarks/baseline.json
+#
+# Sale con código 1 si algún resultado empeora más de --threshold respecto a la línea base.
+
+import argparse
+import functools
+import gc
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.fake_nocodb import FakeNocoDB
+from benchmarks.synthetic import Dataset, build_dataset
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+
+def setup_environment(fake: FakeNocoDB, cache_dir: str, cache_ttl: float):
+    """Apunta la configuración al NocoDB falso. Debe llamarse antes de importar config.py."""
+    os.environ["NOCODB_URL"]         = fake.url
+    os.environ["NOCODB_API_TOKEN"]   = "bench"
+    os.environ["SAVAGEPY_CACHE_DIR"] = cache_dir
+    os.environ["SAVAGEPY_DATA_TTL"]  = str(cache_ttl)
+
+
+def measure(fn, repeat: int, fake: FakeNocoDB) -> dict:
+    """Una pasada con tracemalloc (pico de memoria) y `repeat` pasadas cronometradas."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    times = []
+    requests_before = fake.requests
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        "median_s": round(statistics.median(times), 5),
+        "min_s":    round(min(times), 5),
+        "peak_kib": round(peak / 1024, 1),
+        "nocodb_requests": (fake.requests - requests_before) // repeat,
+    }
+
+
+def run(rows: list[int], repeat: int, formats: set[str], docs: set[str] | None,
+        fake: FakeNocoDB, cache_dir: str) -> dict:
+    from config import TABLE_CONFIG, DOCUMENTS
+    from generate import doc_type, render_html, render_pdf, render_docx
+    from nocodb_client import get_table
+
+    # Sin cachés de documentos generados: cada pasada mide el render completo
+    renderers = {"html": render_html,
+                 "pdf":  functools.partial(render_pdf, use_cache=False),
+                 "docx": functools.partial(render_docx, use_cache=False)}
+    results = {}
+
+    for n in rows:
+        print(f"\n── {n} filas por tabla ─────────────────────────────")
+        fake.dataset = build_dataset(n, TABLE_CONFIG)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+        for table_key in TABLE_CONFIG:
+            key = f"{n}/get_table/{table_key}"
+            results[key] = _safe(measure, lambda: get_table(table_key), repeat, fake)
+            _print(key, results[key])
+
+        for group_key, group in DOCUMENTS.items():
+            for doc_key, doc in group["docs"].items():
+                doc_id = f"{group_key}.{doc_key}"
+                if docs and doc_id not in docs:
+                    continue
+                ops = ["html", "pdf"] if doc_type(doc) == "html" else ["docx"]
+                for op in ops:
+                    if op not in formats:
+                        continue
+                    key = f"{n}/render_{op}/{doc_id}"
+                    render = renderers[op]
+                    results[key] = _safe(measure, lambda: render(doc_id), repeat, fake)
+                    _print(key, results[key])
+    return results
+
+
+def _safe(fn, *args) -> dict:
+    try:
+        return fn(*args)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+def _print(key: str, r: dict):
+    if "error" in r:
+        print(f"  {key:<48} ERROR {r['error']}")
+    else:
+        print(f"  {key:<48} {r['median_s'] * 1000:9.1f} ms  {r['peak_kib']:10.0f} KiB  "
+              f"{r['nocodb_requests']:5d} req")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Resultados que empeoran más de `threshold` (fracción) en tiempo mediano o memoria pico."""
+    regressions = []
+    for key, r in results.items():
+        base = baseline.get(key)
+        if not base or "error" in r or "error" in base:
+            continue
+        for metric in ("median_s", "peak_kib"):
+            if base[metric] > 0 and r[metric] > base[metric] * (1 + threshold):
+                regressions.append(f"{key} {metric}: {base[metric]} → {r[metric]} "
+                                   f"(+{(r[metric] / base[metric] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de render contra un NocoDB falso")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000], help="Filas por tabla")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia por petición del NocoDB falso (s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Pasadas cronometradas por medición")
+    parser.add_argument("--formats", nargs="+", default=["html", "pdf", "docx"], help="Formatos a medir")
+    parser.add_argument("--docs", nargs="+", default=None, help="Limitar a estos doc_id")
+    parser.add_argument("--cache-ttl", type=float, default=0, help="SAVAGEPY_DATA_TTL durante el benchmark")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Archivo de línea base")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar los resultados como línea base")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Empeoramiento tolerado (0.20 = 20%%)")
+    parser.add_argument("--output", default=None, help="Guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="savagepy-bench-")
+    with FakeNocoDB(Dataset(), latency=args.latency) as fake:
+        setup_environment(fake, cache_dir, args.cache_ttl)
+        try:
+            results = run(args.rows, args.repeat, set(args.formats),
+                          set(args.docs) if args.docs else None, fake, cache_dir)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    report = {"meta": {"latency": args.latency, "repeat": args.repeat, "python": sys.version.split()[0],
+                       "date": time.strftime("%Y-%m-%d %H:%M")},
+              "results": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n[OK] Línea base guardada en {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"\n[i] Sin línea base en {baseline_path} (usa --save-baseline para crearla)")
+        return
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))["results"]
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n[!] {len(regressions)} regresiones (> {args.threshold:.0%}):")
+        for line in regressions:
+            print(f"    {line}")
+        sys.exit(1)
+    print(f"\n[OK] Sin regresiones respecto a {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# benchmarks/fake_nocodb.py
+# NocoDB falso en un hilo local: implementa solo los endpoints que usan
+# nocodb_client.py, generate.py y app.py, con una latencia configurable por petición.
+#
+#   GET /api/v2/tables/{table_id}/records                     (page, limit, viewId, fields, sort)
+#   GET /api/v2/tables/{table_id}/records/{id}
+#   GET /api/v2/tables/{table_id}/links/{link_field_id}/records/{row_id}
+#   GET /api/v2/meta/tables/{table_id}/views
+#   GET /api/v2/meta/columns/{link_field_id}                   (solo la tabla enlazada)
+#
+# Uso:
+#     with FakeNocoDB(dataset, latency=0.01) as fake:
+#         os.environ["NOCODB_URL"] = fake.url
+#
+# O como proceso aparte (necesita un .env con NOCODB_API_TOKEN para leer config.py):
+#     python -m benchmarks.fake_nocodb --rows 100 --latency 0.01 --port 8090
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from benchmarks.synthetic import Dataset
+
+_RECORDS = re.compile(r"^/api/v2/tables/([^/]+)/records$")
+_RECORD  = re.compile(r"^/api/v2/tables/([^/]+)/records/(\d+)$")
+_LINKS   = re.compile(r"^/api/v2/tables/([^/]+)/links/([^/]+)/records/(\d+)$")
+_VIEWS   = re.compile(r"^/api/v2/meta/tables/([^/]+)/views$")
+_COLUMN  = re.compile(r"^/api/v2/meta/columns/([^/]+)$")
+
+
+class FakeNocoDB:
+    """Servidor HTTP en 127.0.0.1 con un puerto libre. `requests` lleva la cuenta de peticiones."""
+
+    def __init__(self, dataset: Dataset, latency: float = 0.0, port: int = 0):
+        self.dataset = dataset
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeNocoDB":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-nocodb", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ── Respuestas ──────────────────────────────────────────────────────────
+
+    def _list_records(self, table_id: str, query: dict) -> tuple[int, dict]:
+        rows = self.dataset.tables.get(table_id)
+        if rows is None:
+            return 404, {"msg": f"Table '{table_id}' not found"}
+        view_id = query.get("viewId")
+        if view_id in self.dataset.view_rows:
+            visible = self.dataset.view_rows[view_id]
+            rows = [r for r in rows if r["Id"] in visible]
+        for field in reversed([f for f in query.get("sort", "").split(",") if f]):
+            name = field.lstrip("-")
+            rows = sorted(rows, key=lambda r: (r.get(name) is None, r.get(name) or ""),
+                          reverse=field.startswith("-"))
+        page  = max(1, int(query.get("page", 1)))
+        limit = min(1000, max(1, int(query.get("limit", 25))))
+        chunk = rows[(page - 1) * limit: page * limit]
+        if query.get("fields"):
+            wanted = query["fields"].split(",")
+            chunk = [{k: r[k] for k in wanted if k in r} for r in chunk]
+        return 200, {
+            "list": chunk,
+            "pageInfo": {"totalRows": len(rows), "page": page, "pageSize": limit,
+                         "isFirstPage": page == 1, "isLastPage": page * limit >= len(rows)},
+        }
+
+    def handle(self, path: str, query: dict) -> tuple[int, dict]:
+        if m := _RECORDS.match(path):
+            return self._list_records(m.group(1), query)
+        if m := _RECORD.match(path):
+            for row in self.dataset.tables.get(m.group(1), []):
+                if row["Id"] == int(m.group(2)):
+                    return 200, row
+            return 404, {"msg": "Record not found"}
+        if m := _LINKS.match(path):
+            related = self.dataset.links.get((m.group(1), m.group(2), int(m.group(3))), [])
+            if query.get("fields"):
+                wanted = query["fields"].split(",")
+                related = [{k: r[k] for k in ["Id"] + wanted if k in r} for r in related]
+            return 200, {"list": related, "pageInfo": {"isLastPage": True, "totalRows": len(related)}}
+        if m := _VIEWS.match(path):
+            return 200, {"list": self.dataset.views.get(m.group(1), [])}
+        if m := _COLUMN.match(path):
+            if m.group(1) not in self.dataset.columns:
+                return 404, {"msg": "Column not found"}
+            return 200, {"id": m.group(1), "colOptions": {"fk_related_model_id": self.dataset.columns[m.group(1)]}}
+        return 404, {"msg": f"Not found: {path}"}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with fake._lock:
+                    fake.requests += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                parts = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                status, body = fake.handle(parts.path, query)
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    import argparse
+    from benchmarks.synthetic import build_dataset
+    from config import TABLE_CONFIG
+
+    parser = argparse.ArgumentParser(description="NocoDB falso con datos sintéticos (para pruebas de carga)")
+    parser.add_argument("--rows", type=int, default=100, help="Filas por tabla")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia por petición (s)")
+    parser.add_argument("--port", type=int, default=8090, help="Puerto (por defecto 8090)")
+    args = parser.parse_args()
+
+    fake = FakeNocoDB(build_dataset(args.rows, TABLE_CONFIG), latency=args.latency, port=args.port)
+    print(f"NocoDB falso en {fake.url} ({args.rows} filas por tabla). Arranca la app con NOCODB_URL={fake.url}")
+    fake.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
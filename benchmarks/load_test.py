@@ -0,0 +1,248 @@
+# benchmarks/load_test.py
+# Prueba de carga concurrente de las rutas Flask contra el NocoDB falso.
+#
+# Uso (desde la raíz del proyecto):
+#   # En proceso: arranca el NocoDB falso y usa el cliente de pruebas de Flask
+#   python -m benchmarks.load_test --users 8 --duration 30 --rows 100 --latency 0.01
+#
+#   # Contra un servidor real (p.ej. python app.py serve apuntando a benchmarks.fake_nocodb)
+#   python -m benchmarks.load_test --url http://localhost:5000 --server-pid 12345 --users 16
+#
+#   # Mezcla de rutas (pesos relativos) y documento usado en preview/pdf
+#   python -m benchmarks.load_test --mix preview=4 pdf=2 form-data=2 status=1 --doc power.cards_mobile
+#
+# Informa de peticiones/s, latencia p50/p95/p99 y tasa de error por ruta, y de la
+# memoria (RSS) del servidor a lo largo de la prueba.
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.fake_nocodb import FakeNocoDB
+from benchmarks.synthetic import Dataset, build_dataset
+
+ROUTES = {
+    "preview":   "/preview/{doc}",
+    "pdf":       "/download/{doc}/pdf",
+    "form-data": "/api/form-data",
+    "status":    "/api/status",
+}
+DEFAULT_MIX = {"preview": 4, "pdf": 2, "form-data": 2, "status": 1}
+
+
+# ── CLIENTES ───────────────────────────────────────────────────────────────
+
+class _FlaskClient:
+    """Cliente de pruebas de Flask (uno por usuario: no se comparte entre hilos)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path: str) -> int:
+        response = self.client.get(path)
+        response.close()
+        return response.status_code
+
+
+class _HttpClient:
+    def __init__(self, base_url: str):
+        import requests
+        self.session = requests.Session()
+        self.base_url = base_url.rstrip("/")
+
+    def get(self, path: str) -> int:
+        return self.session.get(self.base_url + path, timeout=300).status_code
+
+
+# ── MEMORIA ────────────────────────────────────────────────────────────────
+
+def rss_kib(pid: int) -> float | None:
+    """RSS actual de un proceso (Linux /proc); None si no se puede leer."""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return float(line.split()[1])
+    except OSError:
+        pass
+    if pid == os.getpid():
+        try:
+            import resource
+            return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+        except ImportError:
+            pass
+    return None
+
+
+class MemorySampler(threading.Thread):
+    def __init__(self, pid: int, interval: float):
+        super().__init__(name="memory-sampler", daemon=True)
+        self.pid, self.interval = pid, interval
+        self.samples: list[tuple[float, float]] = []
+        self._done = threading.Event()
+        self._start_time = time.perf_counter()
+
+    def run(self):
+        while not self._done.is_set():
+            value = rss_kib(self.pid)
+            if value is not None:
+                self.samples.append((round(time.perf_counter() - self._start_time, 2), value))
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+# ── CARGA ──────────────────────────────────────────────────────────────────
+
+def run_load(make_client, mix: dict[str, int], doc: str, users: int, duration: float,
+             ramp_up: float, seed: int) -> tuple[dict, float]:
+    """Lanza `users` hilos que piden rutas según `mix` durante `duration` segundos."""
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    results = {name: {"latencies": [], "statuses": {}, "errors": 0} for name in names}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def user(i: int):
+        rnd = random.Random(seed + i)
+        time.sleep(ramp_up * i / max(1, users))
+        client = make_client()
+        while time.perf_counter() < deadline:
+            name = rnd.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                status = client.get(ROUTES[name].format(doc=doc))
+            except Exception:
+                status = None
+            elapsed = time.perf_counter() - start
+            with lock:
+                r = results[name]
+                r["latencies"].append(elapsed)
+                r["statuses"][status] = r["statuses"].get(status, 0) + 1
+                if status is None or status >= 500:
+                    r["errors"] += 1
+
+    threads = [threading.Thread(target=user, args=(i,), name=f"user-{i}") for i in range(users)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, time.perf_counter() - started
+
+
+def summarize(results: dict, elapsed: float) -> dict:
+    summary = {}
+    for name, r in results.items():
+        lat = sorted(r["latencies"])
+        n = len(lat)
+        if n >= 2:
+            q = statistics.quantiles(lat, n=100, method="inclusive")
+            p50, p95, p99 = q[49], q[94], q[98]
+        else:
+            p50 = p95 = p99 = lat[0] if lat else 0.0
+        summary[name] = {
+            "requests": n,
+            "rps":      round(n / elapsed, 2) if elapsed else 0.0,
+            "p50_ms":   round(p50 * 1000, 1),
+            "p95_ms":   round(p95 * 1000, 1),
+            "p99_ms":   round(p99 * 1000, 1),
+            "error_rate": round(r["errors"] / n, 4) if n else 0.0,
+            "statuses": {str(k): v for k, v in r["statuses"].items()},
+        }
+    return summary
+
+
+def print_report(summary: dict, elapsed: float, memory: list[tuple[float, float]]):
+    total = sum(s["requests"] for s in summary.values())
+    print(f"\n{total} peticiones en {elapsed:.1f} s → {total / elapsed:.1f} req/s\n")
+    print(f"  {'ruta':<10} {'n':>6} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'error':>7}")
+    for name, s in summary.items():
+        print(f"  {name:<10} {s['requests']:>6} {s['rps']:>7} {s['p50_ms']:>9} {s['p95_ms']:>9} "
+              f"{s['p99_ms']:>9} {s['error_rate']:>7.1%}")
+    if memory:
+        values = [v for _, v in memory]
+        print(f"\n  RSS: inicio {values[0] / 1024:.0f} MiB · máx {max(values) / 1024:.0f} MiB · "
+              f"final {values[-1] / 1024:.0f} MiB ({len(values)} muestras)")
+
+
+def _parse_mix(items: list[str] | None) -> dict[str, int]:
+    if not items:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition("=")
+        if name not in ROUTES:
+            raise SystemExit(f"Ruta desconocida '{name}'. Disponibles: {', '.join(ROUTES)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga concurrente de savagePy")
+    parser.add_argument("--users", type=int, default=8, help="Usuarios concurrentes")
+    parser.add_argument("--duration", type=float, default=30, help="Duración en segundos")
+    parser.add_argument("--ramp-up", type=float, default=2, help="Segundos hasta tener todos los usuarios")
+    parser.add_argument("--mix", nargs="+", default=None, help="ruta=peso (preview, pdf, form-data, status)")
+    parser.add_argument("--doc", default="power.cards_mobile", help="Documento para preview/pdf")
+    parser.add_argument("--url", default=None, help="Servidor real; sin esto se usa el cliente de pruebas de Flask")
+    parser.add_argument("--server-pid", type=int, default=None, help="PID del servidor para medir su memoria")
+    parser.add_argument("--rows", type=int, default=100, help="Filas por tabla del NocoDB falso (modo en proceso)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia del NocoDB falso (modo en proceso)")
+    parser.add_argument("--cache-ttl", type=float, default=0, help="SAVAGEPY_DATA_TTL (modo en proceso)")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Intervalo de muestreo de memoria")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Guardar resumen y serie de memoria en JSON")
+    args = parser.parse_args()
+    mix = _parse_mix(args.mix)
+
+    fake = None
+    cache_dir = None
+    if args.url:
+        make_client = lambda: _HttpClient(args.url)
+        pid = args.server_pid
+    else:
+        from benchmarks.bench_render import setup_environment
+        cache_dir = tempfile.mkdtemp(prefix="savagepy-load-")
+        fake = FakeNocoDB(Dataset(), latency=args.latency).start()
+        setup_environment(fake, cache_dir, args.cache_ttl)
+        from config import TABLE_CONFIG
+        fake.dataset = build_dataset(args.rows, TABLE_CONFIG)
+        from app import app
+        make_client = lambda: _FlaskClient(app)
+        pid = os.getpid()
+
+    sampler = MemorySampler(pid, args.sample_interval) if pid else None
+    if sampler:
+        sampler.start()
+    try:
+        print(f"{args.users} usuarios · {args.duration:.0f} s · mezcla {mix} · doc {args.doc}")
+        results, elapsed = run_load(make_client, mix, args.doc, args.users, args.duration,
+                                    args.ramp_up, args.seed)
+    finally:
+        if sampler:
+            sampler.stop()
+        if fake:
+            fake.stop()
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    summary = summarize(results, elapsed)
+    memory = sampler.samples if sampler else []
+    print_report(summary, elapsed, memory)
+    if args.output:
+        Path(args.output).write_text(json.dumps(
+            {"users": args.users, "duration": elapsed, "mix": mix, "doc": args.doc,
+             "routes": summary, "memory_kib": memory}, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# benchmarks/synthetic.py
+# Datos sintéticos con la misma forma que devuelve NocoDB para cada tabla de TABLE_CONFIG.
+# Los IDs de tabla y de campo de enlace salen de config.py, así el cliente real
+# (nocodb_client.py) hace exactamente las mismas peticiones que en producción.
+
+import json
+import random
+
+RANKS      = ["Novato", "Experimentado", "Veterano", "Heroico", "Legendario"]
+DICE       = ["d4", "d6", "d8", "d10", "d12", "d12+1"]
+ATTRIBUTES = ["agility", "smarts", "spirit", "strength", "vigor"]
+SOURCES    = ["Oficial", "Terceros", "Propio"]
+WORDS      = ("el la los un una de del con sin por para arcano sombra fuego hielo espada escudo "
+              "bestia vigor astucia espíritu fuerza agilidad poder ventaja desventaja rango "
+              "hechizo guardia tormenta ruina ritual sangre hueso piedra viento eco").split()
+
+
+class Dataset:
+    """Registros por table_id, enlaces por (table_id, link_field_id, row_id) y vistas por table_id.
+    view_rows: para cada vista `pub:` sintética, los Id de los registros que muestra.
+    columns: table_id de la tabla enlazada por cada link_field_id (sus registros están en tables)."""
+
+    def __init__(self):
+        self.tables: dict[str, list[dict]] = {}
+        self.links: dict[tuple[str, str, int], list[dict]] = {}
+        self.columns: dict[str, str] = {}
+        self.views: dict[str, list[dict]] = {}
+        self.view_rows: dict[str, set[int]] = {}
+
+    def total_rows(self) -> int:
+        return sum(len(rows) for rows in self.tables.values())
+
+
+def _text(rnd: random.Random, words: int) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _book(rnd: random.Random) -> dict:
+    return {"Id": rnd.randint(1, 5), "title": rnd.choice(["SWADE", "Fantasy Companion", "Horror Companion"])}
+
+
+def _character_data(rnd: random.Random, i: int) -> dict:
+    return {
+        "name": f"Personaje {i}",
+        "concept": _text(rnd, 3),
+        "description": _text(rnd, 40),
+        "attributes": {a: rnd.choice(DICE[:5]) for a in ATTRIBUTES},
+        "skills": [{"name": f"Habilidad {k}", "value": rnd.choice(DICE[:5] + [""]), "is_core": k < 5}
+                   for k in range(20)],
+        "edges": [f"Ventaja {rnd.randint(1, 200)}" for _ in range(rnd.randint(2, 8))],
+        "hindrances": [f"Desventaja {rnd.randint(1, 100)}" for _ in range(rnd.randint(1, 4))],
+        "powers": [{"name": f"Poder {rnd.randint(1, 300)}"} for _ in range(rnd.randint(0, 6))],
+        "power_points": rnd.choice([0, 10, 15, 20]),
+        "ancestry": {"name": "Humano", "traits": ["Adaptable", "Versátil"]},
+        "advances": [{"rank": RANKS[k // 4], "order": k + 1, "description": _text(rnd, 6)}
+                     for k in range(rnd.randint(0, 19))],
+        "gear_by_rank": {r: [{"item": _text(rnd, 2), "notes": _text(rnd, 3)} for _ in range(rnd.randint(0, 4))]
+                         for r in RANKS},
+        "special": {r: _text(rnd, 8) if rnd.random() < 0.3 else "" for r in RANKS},
+    }
+
+
+def _creature_data(rnd: random.Random, i: int) -> dict:
+    wild_card = rnd.random() < 0.2
+    return {
+        "name": f"Criatura {i}",
+        "type": rnd.choice(["Bestia", "Humanoide", "No muerto", "Constructo", "Demonio"]),
+        "concept": _text(rnd, 4),
+        "description": _text(rnd, 50),
+        "wild_card": wild_card,
+        "attributes": {a: rnd.choice(DICE) for a in ATTRIBUTES},
+        "pace": rnd.choice([4, 6, 8, 10, 12]),
+        "parry": rnd.randint(2, 12),
+        "toughness": rnd.randint(4, 20),
+        "size": rnd.randint(-2, 8),
+        "wounds": rnd.choice(["", 0, 1, 3]),
+        "skills": [{"name": f"Habilidad {k}", "value": rnd.choice(DICE + [""])} for k in range(8)],
+        "edges": [f"Ventaja {rnd.randint(1, 200)}" for _ in range(rnd.randint(0, 5))],
+        "hindrances": [f"Desventaja {rnd.randint(1, 100)}" for _ in range(rnd.randint(0, 2))],
+        "powers": [{"name": f"Poder {rnd.randint(1, 300)}"} for _ in range(rnd.randint(0, 3))],
+        "gear": [{"item": _text(rnd, 2), "notes": _text(rnd, 3)} for _ in range(rnd.randint(0, 4))],
+        "special_abilities": [{"name": _text(rnd, 2), "description": _text(rnd, 20)}
+                              for _ in range(rnd.randint(1, 6))],
+    }
+
+
+def _row(table_key: str, rnd: random.Random, i: int) -> dict:
+    name = {"name": f"{table_key.capitalize()} {i}", "name_original": f"{table_key} {i}"}
+    if table_key == "skill":
+        return {**name, "attribute": rnd.choice(ATTRIBUTES), "is_core": i <= 5, "description": _text(rnd, 20)}
+    if table_key == "ancestry":
+        return {**name, "traits": _text(rnd, 12)}
+    if table_key == "reference_book":
+        return {"title": f"Libro {i}", "description": _text(rnd, 10)}
+    if table_key == "power":
+        return {**name, "rank_name": rnd.choice(RANKS), "cost": str(rnd.randint(1, 5)),
+                "range": rnd.choice(["Personal", "Toque", "Ast"]), "range_roh": "", "duration": "5",
+                "page_no": rnd.randint(100, 300), "description": _text(rnd, 80),
+                "reference_book": _book(rnd), "modifier": rnd.randint(0, 4)}
+    if table_key == "edge":
+        return {**name, "type": rnd.choice(["Trasfondo", "Combate", "Liderazgo", "Profesional"]),
+                "rank_name": rnd.choice(RANKS), "requirements": _text(rnd, 5), "description": _text(rnd, 50),
+                "page_no": rnd.randint(30, 60), "reference_book": _book(rnd)}
+    if table_key == "hindrance":
+        return {**name, "severity": rnd.choice(["Mayor", "Menor", "Mayor o Menor"]),
+                "description": _text(rnd, 40), "page_no": rnd.randint(20, 30), "reference_book": _book(rnd)}
+    if table_key == "character":
+        data = _character_data(rnd, i)
+        return {"name": data["name"], "concept": data["concept"],
+                "data": json.dumps(data, ensure_ascii=False), "image": []}
+    if table_key == "bestiary":
+        data = _creature_data(rnd, i)
+        return {"name": data["name"], "type": data["type"], "concept": data["concept"],
+                "wild_card": int(data["wild_card"]), "data": json.dumps(data, ensure_ascii=False), "image": []}
+    if table_key == "treasure":
+        return {"name": f"Tesoro {i}", "type": rnd.choice(["Arma", "Reliquia", "Poción"]), "stat": _text(rnd, 3),
+                "description": _text(rnd, 30), "ability": _text(rnd, 15),
+                "rarity": rnd.choice(["Común", "Rara", "Legendaria"]), "image": []}
+    if table_key == "equipment":
+        return {**name, "type": rnd.choice(["Armas", "Armaduras", "Equipo"]), "traits": _text(rnd, 3),
+                "notes": _text(rnd, 8), "cost": rnd.randint(5, 500), "weight": rnd.randint(1, 20),
+                "source": rnd.choice(SOURCES), "reference_book": _book(rnd), "page_no": rnd.randint(40, 80)}
+    if table_key == "tag":
+        return {"name": f"Trasfondo {i}", "power_names": [f"Poder {rnd.randint(1, 300)}" for _ in range(12)],
+                "comment": _text(rnd, 10)}
+    if table_key == "rule":
+        content = "\n\n".join(f"### {_text(rnd, 3)}\n\n{_text(rnd, 60)}\n\n- {_text(rnd, 8)}\n- {_text(rnd, 8)}"
+                              for _ in range(rnd.randint(1, 4)))
+        return {**name, "description": _text(rnd, 15), "content": content, "source": rnd.choice(SOURCES),
+                "icon": "⚖", "page_no": rnd.randint(90, 140), "reference_book": _book(rnd)}
+    return {**name}
+
+
+def build_dataset(rows: int, table_config: dict, seed: int = 0) -> Dataset:
+    """Genera `rows` registros por tabla (los datos son deterministas para una misma semilla)."""
+    rnd = random.Random(seed)
+    ds = Dataset()
+    for table_key, cfg in table_config.items():
+        table_id = cfg["table_id"]
+        table_rows = []
+        for i in range(1, rows + 1):
+            row = {"Id": i, **_row(table_key, rnd, i), "UpdatedAt": f"2026-01-01 00:00:{i % 60:02d}+00:00"}
+            table_rows.append(row)
+            for rel in cfg.get("relations", []):
+                count = row.get(rel.get("count_field", rel["key"]), 0)
+                related = [
+                    {"Id": i * 100 + k, "title": _text(rnd, 2), "cost": f"+{rnd.randint(1, 3)}",
+                     "description": _text(rnd, 20), "UpdatedAt": row["UpdatedAt"]}
+                    for k in range(count if isinstance(count, int) else 0)
+                ]
+                ds.links[(table_id, rel["link_field_id"], i)] = related
+                related_id = rel.get("table_id") or f"{table_id}_{rel['key']}"
+                ds.columns[rel["link_field_id"]] = related_id
+                ds.tables.setdefault(related_id, []).extend(related)
+        ds.tables[table_id] = table_rows
+        views = [{"id": cfg["view_id"], "title": "Todos"}] if cfg.get("view_id") else []
+        for k in range(3):
+            view_id = f"vwbench{table_key}{k}"
+            views.append({"id": view_id, "title": f"pub:Vista {k + 1}"})
+            ds.view_rows[view_id] = {row["Id"] for row in table_rows if row["Id"] % 3 == k}
+        ds.views[table_id] = views
+    return ds
@@ -0,0 +1,261 @@
+# bestiary_stats.py
+# Estadísticas del bestiario para preparar encuentros.
+#
+# Cada criatura se reduce una vez a una fila de números (dados de atributo, paso,
+# parada, dureza, armadura...) y todas juntas forman una tabla por columnas en NumPy:
+#   summary()    — recuento, media, mínimo, máximo y percentiles, agrupados por tipo o comodín
+#   comparable() — las criaturas más parecidas a una dada, con su percentil en cada estadística
+#
+# La tabla se reconstruye cuando cambia el índice del bestiario (get_index), pero cada
+# fila se guarda con el JSON del que salió: al guardar una criatura solo se vuelve a
+# parsear esa. NumPy es opcional; sin él estas consultas no están disponibles.
+
+import functools
+import importlib.util
+import re
+import threading
+import warnings
+
+from nocodb_client import _parse_data, get_index
+
+ATTRIBUTES = ("agility", "smarts", "spirit", "strength", "vigor")
+DERIVED    = ("pace", "parry", "toughness", "armor", "size", "wounds", "power_points")
+STATS      = ATTRIBUTES + DERIVED
+GROUPS     = ("type", "wild_card")
+BANDS      = (10, 25, 50, 75, 90)
+
+# El formulario guarda 0 en los campos vacíos: en estas estadísticas 0 es "falta"
+# (el tamaño 0 es el de un humano y las heridas vacías se guardan como 3).
+UNSET_ZERO = ("pace", "parry", "toughness", "armor", "power_points")
+
+_DIE = re.compile(r"^\s*d(\d+)\s*(?:([+-])\s*(\d+))?\s*$", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=None)
+def available() -> bool:
+    return importlib.util.find_spec("numpy") is not None
+
+
+# ── FILAS ──────────────────────────────────────────────────────────────────
+
+def die_value(value) -> float | None:
+    """'d8' → 8, 'd12+2' → 14. None si no es un dado."""
+    match = _DIE.match(str(value or ""))
+    if not match:
+        return None
+    die, sign, mod = match.groups()
+    return int(die) + (int(mod) if sign == "+" else -int(mod) if sign else 0)
+
+
+def _number(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def armor_value(data: dict) -> float | None:
+    """Armadura de una ficha: el campo "armor" si lo tiene o, si no, el valor de la
+    variante de dureza, que es el bono de armadura que la hoja suma a la dureza."""
+    armor = _number(data.get("armor"))
+    if armor:
+        return armor
+    variant = data.get("toughness_variant")
+    return _number(variant.get("value")) if isinstance(variant, dict) else None
+
+
+def stat_row(data: dict) -> tuple:
+    """Valores de STATS de una ficha (None si falta o es un 0 de UNSET_ZERO)."""
+    attributes = data.get("attributes") or {}
+    derived = {stat: _number(data.get(stat)) for stat in DERIVED}
+    derived["armor"] = armor_value(data)
+    for stat in UNSET_ZERO:
+        if derived[stat] == 0:
+            derived[stat] = None
+    return (tuple(die_value(attributes.get(attr)) for attr in ATTRIBUTES)
+            + tuple(derived[stat] for stat in DERIVED))
+
+
+# Id → (campos del registro de los que sale la fila, fila)
+_rows: dict = {}
+_rows_lock = threading.Lock()
+
+
+def _record_row(rec: dict) -> tuple:
+    """(Id, nombre, tipo, comodín, fila) de un registro, reutilizando la fila si no ha cambiado."""
+    source = (rec.get("name"), rec.get("type"), rec.get("wild_card"), rec.get("data"))
+    with _rows_lock:
+        cached = _rows.get(rec.get("Id"))
+    if cached and cached[0] == source:
+        return cached[1]
+    data = _parse_data(rec.get("data") or "{}", first=True)
+    data = data if isinstance(data, dict) else {}
+    row = (rec.get("Id"), rec.get("name") or "", rec.get("type") or data.get("type") or "",
+           bool(rec.get("wild_card") or data.get("wild_card")), stat_row(data))
+    with _rows_lock:
+        _rows[rec.get("Id")] = (source, row)
+    return row
+
+
+# ── TABLA ──────────────────────────────────────────────────────────────────
+
+class StatTable:
+    """Criaturas de una vista en columnas: ids, names, types, wild_cards y values (n × STATS, NaN si falta)."""
+
+    __slots__ = ("ids", "names", "types", "wild_cards", "values", "_position")
+
+    def __init__(self, rows: list):
+        import numpy as np
+        self.ids        = np.array([row[0] for row in rows], dtype=np.int64)
+        self.names      = [row[1] for row in rows]
+        self.types      = np.array([row[2] for row in rows], dtype=object)
+        self.wild_cards = np.array([row[3] for row in rows], dtype=bool)
+        self.values     = np.array([[np.nan if v is None else v for v in row[4]] for row in rows],
+                                   dtype=np.float64).reshape(len(rows), len(STATS))
+        self._position  = {int(record_id): i for i, record_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def position(self, record_id) -> int | None:
+        try:
+            return self._position.get(int(record_id))
+        except (TypeError, ValueError):
+            return None
+
+    def group_keys(self, group: str):
+        if group == "wild_card":
+            return self.wild_cards
+        if group == "type":
+            return self.types
+        raise ValueError(f"Agrupación desconocida: {group} (opciones: {', '.join(GROUPS)})")
+
+
+_tables: dict = {}
+_tables_lock = threading.Lock()
+
+
+def get_stat_table(view_id: str | None = None) -> StatTable:
+    """Tabla de la vista (por defecto la del bestiario). Se rehace solo si cambió el índice."""
+    index = get_index("bestiary", view_id)
+    with _tables_lock:
+        cached = _tables.get(view_id)
+    if cached and cached[0] is index:
+        return cached[1]
+    table = StatTable([_record_row(rec) for rec in index.records if rec.get("Id") is not None])
+    with _tables_lock:
+        _tables[view_id] = (index, table)
+        live = {rec.get("Id") for other, _ in _tables.values() for rec in other.records}
+    with _rows_lock:                                   # criaturas borradas o fuera de toda vista
+        for record_id in [rid for rid in _rows if rid not in live]:
+            del _rows[record_id]
+    return table
+
+
+# ── CONSULTAS ──────────────────────────────────────────────────────────────
+
+def stat_columns(names: str | None) -> list[int]:
+    """Posiciones en STATS de una lista 'parry,toughness' (todas si está vacía)."""
+    if not names:
+        return list(range(len(STATS)))
+    wanted = [name.strip() for name in names.split(",") if name.strip()]
+    unknown = [name for name in wanted if name not in STATS]
+    if unknown:
+        raise ValueError(f"Estadística desconocida: {', '.join(unknown)} (opciones: {', '.join(STATS)})")
+    return [STATS.index(name) for name in wanted]
+
+
+def _clean(values) -> list:
+    """Array → lista para JSON (NaN → None, redondeado a 2 decimales)."""
+    return [None if v != v else round(float(v), 2) for v in values]
+
+
+def _describe(values, columns: list[int]) -> dict:
+    """Resumen por columnas de un bloque de filas."""
+    import numpy as np
+    block = values[:, columns]
+    if not len(block):                                           # vista vacía: todo None
+        block = np.full((1, len(columns)), np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)          # columnas sin ningún valor
+        mean  = np.nanmean(block, axis=0)
+        low   = np.nanmin(block, axis=0)
+        high  = np.nanmax(block, axis=0)
+        bands = np.nanpercentile(block, BANDS, axis=0)
+    names = [STATS[i] for i in columns]
+    return {
+        "count": dict(zip(names, np.count_nonzero(~np.isnan(block), axis=0).tolist())),
+        "mean":  dict(zip(names, _clean(mean))),
+        "min":   dict(zip(names, _clean(low))),
+        "max":   dict(zip(names, _clean(high))),
+        "bands": {name: dict(zip((f"p{q}" for q in BANDS), _clean(bands[:, i])))
+                  for i, name in enumerate(names)},
+    }
+
+
+def summary(view_id: str | None = None, group: str | None = None, stats: str | None = None) -> dict:
+    """Resumen del bestiario completo y, si se pide, de cada grupo (tipo o comodín)."""
+    import numpy as np
+    table = get_stat_table(view_id)
+    columns = stat_columns(stats)
+    result = {"stats": [STATS[i] for i in columns], "creatures": len(table),
+              "all": _describe(table.values, columns)}
+    if group:
+        keys = table.group_keys(group)
+        groups = []
+        for key in sorted(set(keys.tolist()), key=str):
+            mask = keys == key
+            groups.append({"key": key, "creatures": int(np.count_nonzero(mask)),
+                           **_describe(table.values[mask], columns)})
+        result["group"], result["groups"] = group, groups
+    return result
+
+
+def comparable(record_id, view_id: str | None = None, stats: str | None = None,
+               limit: int = 10, same_type: bool = False, wild_card: bool | None = None) -> dict | None:
+    """Criaturas más parecidas a `record_id`: distancia media entre estadísticas
+    estandarizadas (cada una dividida por su desviación típica), contando solo las que
+    tienen las dos. None si la criatura no está en la vista."""
+    import numpy as np
+    table = get_stat_table(view_id)
+    pos = table.position(record_id)
+    if pos is None:
+        return None
+    columns = stat_columns(stats)
+    block = table.values[:, columns]
+    target = block[pos]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        spread = np.nanstd(block, axis=0)
+        spread = np.where(np.isnan(spread) | (spread == 0), 1.0, spread)
+        distance = np.sqrt(np.nanmean(((block - target) / spread) ** 2, axis=1))
+
+    # Percentil de la criatura en cada estadística (empates cuentan la mitad)
+    present = ~np.isnan(block)
+    below = np.count_nonzero(present & (block < target), axis=0)
+    equal = np.count_nonzero(present & (block == target), axis=0)
+    counts = np.count_nonzero(present, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percentile = np.where(np.isnan(target), np.nan, 100 * (below + equal / 2) / counts)
+
+    candidates = ~np.isnan(distance)
+    candidates[pos] = False
+    if same_type:
+        candidates &= table.types == table.types[pos]
+    if wild_card is not None:
+        candidates &= table.wild_cards == wild_card
+    order = np.flatnonzero(candidates)
+    order = order[np.argsort(distance[order], kind="stable")[:max(0, limit)]]
+
+    names = [STATS[i] for i in columns]
+
+    def creature(i: int) -> dict:
+        return {"id": int(table.ids[i]), "name": table.names[i], "type": table.types[i],
+                "wild_card": bool(table.wild_cards[i]), "stats": dict(zip(names, _clean(block[i])))}
+
+    return {
+        "stats": names,
+        "creature": {**creature(pos), "percentiles": dict(zip(names, _clean(percentile)))},
+        "comparable": [{**creature(i), "distance": round(float(distance[i]), 3)} for i in order],
+    }
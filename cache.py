@@ -0,0 +1,167 @@
+# cache.py
+# Caché compartida entre procesos (trabajadores de gunicorn, servidor de desarrollo, CLI).
+# Cada espacio de nombres es un directorio bajo CACHE_DIR; cada entrada, un pickle
+# con su fecha de caducidad. Las escrituras son atómicas (archivo temporal + rename),
+# así que varios procesos pueden leer y escribir a la vez sin bloqueos.
+#
+# SingleFlight agrupa llamadas simultáneas e idénticas dentro de un proceso.
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from config import CACHE_DIR
+
+_MISSING = object()
+
+
+def _json_default(value):
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    return str(value)
+
+
+def content_hash(*parts) -> str:
+    """Hash estable del contenido (dicts, listas, LazyRecord...) para usar como clave o versión."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=_json_default)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def file_version(path) -> str:
+    """Versión barata de un archivo: mtime en ns + tamaño ('' si no existe)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ""
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+class SharedCache:
+    """
+    Almacén clave → valor persistido en disco y compartido por todos los procesos.
+
+    Uso:
+        tables = SharedCache("tables/power")
+        tables.set("vwxxxx", records, ttl=60)
+        tables.get("vwxxxx")          # None si no existe o ha caducado
+        tables.clear()                # invalida todo el espacio de nombres
+    """
+
+    def __init__(self, namespace: str, default_ttl: float | None = None):
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.path = Path(CACHE_DIR) / namespace
+
+    def _file(self, key: str) -> Path:
+        return self.path / (hashlib.sha1(str(key).encode("utf-8")).hexdigest() + ".pkl")
+
+    def get(self, key: str, default=None):
+        value, _ = self.get_with_age(key, default)
+        return value
+
+    def get_with_age(self, key: str, default=None, allow_expired: bool = False):
+        """Devuelve (valor, segundos desde que se guardó). Con allow_expired=True
+        devuelve también entradas caducadas (útil para servir datos antiguos)."""
+        try:
+            with open(self._file(key), "rb") as f:
+                stored_at, expires_at, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            return default, None
+        if expires_at is not None and expires_at < time.time() and not allow_expired:
+            return default, None
+        return value, time.time() - stored_at
+
+    def set(self, key: str, value, ttl: float | None = _MISSING):
+        ttl = self.default_ttl if ttl is _MISSING else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        self.path.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((now, expires_at, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._file(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def values(self) -> list:
+        """Todos los valores vigentes del espacio de nombres (sin orden definido)."""
+        result = []
+        for file in self.path.glob("*.pkl"):
+            try:
+                with open(file, "rb") as f:
+                    _, expires_at, value = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+                continue
+            if expires_at is None or expires_at >= time.time():
+                result.append(value)
+        return result
+
+    def version(self, key: str) -> str:
+        """Versión de una entrada (cambia cada vez que se reescribe); '' si no existe."""
+        return file_version(self._file(key))
+
+    def delete(self, key: str):
+        self._file(key).unlink(missing_ok=True)
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas simultáneas con la misma clave: la primera ejecuta la función y
+    las que llegan mientras tanto esperan y reciben su resultado (o su excepción).
+    Solo dentro de un proceso: cada trabajador de gunicorn agrupa las de sus hilos.
+
+    Uso:
+        renders = SingleFlight()
+        pdf, joined = renders.do(("pdf", doc_id, view_id), lambda: render(...))
+        # joined=True si el resultado lo calculó otra petición (no modificarlo)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict = {}
+
+    def do(self, key, fn) -> tuple:
+        with self._lock:
+            call = self._calls.get(key)
+            joined = call is not None
+            if not joined:
+                call = self._calls[key] = _Call()
+        if joined:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -11,6 +11,64 @@ BASE_ID    = os.getenv("NOCODB_BASE_ID")
 if not API_TOKEN:
     raise EnvironmentError("Falta NOCODB_API_TOKEN en el archivo .env")
 
+# ── CACHÉ ──────────────────────────────────────────────────────────────────
+#
+# CACHE_DIR      : directorio de la caché compartida entre procesos (cache.py)
+# DATA_CACHE_TTL : segundos que se reutilizan los registros de NocoDB (0 = sin caché)
+#
+CACHE_DIR      = os.getenv("SAVAGEPY_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+DATA_CACHE_TTL = float(os.getenv("SAVAGEPY_DATA_TTL", "60"))
+
+# ── RESILIENCIA NOCODB ─────────────────────────────────────────────────────
+#
+# NOCODB_TIMEOUT    : segundos máximos por petición a NocoDB
+# BREAKER_THRESHOLD : fallos seguidos que abren el circuito (las peticiones fallan al instante)
+# BREAKER_COOLDOWN  : segundos con el circuito abierto antes de volver a intentarlo
+#
+NOCODB_TIMEOUT    = float(os.getenv("SAVAGEPY_NOCODB_TIMEOUT", "10"))
+BREAKER_THRESHOLD = int(os.getenv("SAVAGEPY_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN  = float(os.getenv("SAVAGEPY_BREAKER_COOLDOWN", "30"))
+
+# ── BARAJAS ────────────────────────────────────────────────────────────────
+#
+# DECK_CACHE_MB : MB en disco (por baraja, ver DOCUMENTS["deck"]) para los PDF de sus páginas ya maquetadas
+#
+DECK_CACHE_MB = float(os.getenv("SAVAGEPY_DECK_CACHE_MB", "200"))
+
+# ── PREVISUALIZACIÓN ───────────────────────────────────────────────────────
+# Registros que se muestran de entrada al previsualizar barajas y otros documentos
+# largos ("lazy_preview" en DOCUMENTS); el resto se carga por trozos al hacer scroll.
+
+PREVIEW_PAGE_SIZE = int(os.getenv("SAVAGEPY_PREVIEW_PAGE_SIZE", "24"))
+
+# ── EXPORTACIÓN POR VISTAS ─────────────────────────────────────────────────
+#
+# EXPORT_WORKERS : vistas que se descargan y generan a la vez en /download/<doc>/views/...
+#
+EXPORT_WORKERS = int(os.getenv("SAVAGEPY_EXPORT_WORKERS", "4"))
+
+# ── IMÁGENES ───────────────────────────────────────────────────────────────
+#
+# MAX_UPLOAD_MB : tamaño máximo de una imagen subida desde los formularios
+#
+MAX_UPLOAD_MB = float(os.getenv("SAVAGEPY_MAX_UPLOAD_MB", "15"))
+
+# ── WEBHOOKS ───────────────────────────────────────────────────────────────
+#
+# WEBHOOK_SECRET    : secreto compartido con NocoDB para /api/webhooks/nocodb (vacío = desactivado)
+# WEBHOOK_PRERENDER : tras un cambio, regenerar en segundo plano los documentos de esa tabla
+#
+WEBHOOK_SECRET    = os.getenv("SAVAGEPY_WEBHOOK_SECRET", "")
+WEBHOOK_PRERENDER = os.getenv("SAVAGEPY_WEBHOOK_PRERENDER") == "1"
+
+# ── PERFILADO ──────────────────────────────────────────────────────────────
+#
+# PROFILE_ENABLED : permite ?profile=1 en las rutas de previsualización/descarga
+# PROFILES_DIR    : dónde se guardan los informes (.prof + .txt)
+#
+PROFILE_ENABLED = os.getenv("SAVAGEPY_PROFILE") == "1"
+PROFILES_DIR    = os.path.join(CACHE_DIR, "profiles")
+
 # ── CONFIGURACIÓN DE TABLAS ────────────────────────────────────────────────
 #
 # Cada entrada define:
@@ -22,6 +80,8 @@ if not API_TOKEN:
 # Cada relación define:
 #   key            : nombre de la clave en el JSON resultante
 #   link_field_id  : ID del campo de enlace en la tabla padre
+#   table_id       : ID de la tabla enlazada (opcional; si falta se pregunta a NocoDB).
+#                    Su UpdatedAt entra en la versión de los documentos de la tabla padre
 #   count_field    : campo del registro padre que indica cuántos relacionados hay
 #   fields         : campos a recuperar de la tabla relacionada
 #
@@ -97,7 +157,7 @@ TABLE_CONFIG = {
         "table_id": "mxb6bj2wpwq1plw",
         "view_id": "vwnp34efxdp32d6y",
         "glossary": False,
-        "fields": ["name", "data", "image"],
+        "fields": ["name", "concept", "data", "image"],
         "relations": []
     },
 
@@ -173,6 +233,18 @@ TABLE_CONFIG = {
 #   description : texto descriptivo visible en la interfaz
 #   template    : archivo HTML en templates/documents/
 #   data_key    : nombre de la variable que recibe los datos en el template
+#   deck        : (opcional) baraja de cartas que ocupan páginas enteras. El PDF se
+#                 compone de páginas cacheadas por grupo de registros y solo se vuelven
+#                 a maquetar las de los registros que cambian.
+#                 {"per_page": registros por página, "required": campo sin el cual
+#                  el template omite el registro}
+#   lazy_preview: (opcional) la previsualización muestra los primeros registros y carga
+#                 el resto al hacer scroll. Solo para templates en los que cada registro
+#                 se pinta por separado (sin cabeceras ni agrupaciones). Por defecto,
+#                 activado en las barajas ("deck").
+#   linearize   : (opcional) True para generar el PDF linealizado ("vista web rápida",
+#                 requiere pikepdf) y servirlo para abrir en el navegador: el visor del
+#                 teléfono muestra la primera página sin esperar al archivo completo.
 #
 
 DOCUMENTS = {
@@ -215,6 +287,8 @@ DOCUMENTS = {
                 "image": "images/relic01.jpg",
                 "template": "documents/power_cards_mobile.html",
                 "data_key": "powers",
+                "deck": {"per_page": 1},
+                "linearize": True,
             },
             "tags_print": {
                 "label": "Poderes por Trasfondo",
@@ -241,6 +315,8 @@ DOCUMENTS = {
                 "image": "images/relic01.jpg",
                 "template": "documents/edge_cards_mobile.html",
                 "data_key": "edges",
+                "deck": {"per_page": 1},
+                "linearize": True,
             },
         }
     },
@@ -292,6 +368,8 @@ DOCUMENTS = {
                 "image": "images/relic01.jpg",
                 "template": "documents/bestiary_mobile.html",
                 "data_key": "creatures",
+                "lazy_preview": True,
+                "linearize": True,
             },
         }
     },
@@ -309,6 +387,7 @@ DOCUMENTS = {
                 "image": "images/banner01.jpg",
                 "template": "documents/treasure_cards.html",
                 "data_key": "treasures",
+                "deck": {"per_page": 9, "required": "name"},
             },
         }
     },
@@ -335,6 +414,7 @@ DOCUMENTS = {
                 "image": "images/banner01.jpg",
                 "template": "documents/equipment_cards.html",
                 "data_key": "equipment",
+                "deck": {"per_page": 9, "required": "name"},
             },
         }
     },
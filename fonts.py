@@ -0,0 +1,199 @@
+# fonts.py
+# Registro único de fuentes, derivado de los templates.
+#
+# Los templates de documentos siguen enlazando Google Fonts (así se pueden abrir tal
+# cual en un navegador), pero al renderizar esos enlaces se sustituyen por una sola
+# hoja local, static/fonts/fonts.css, con cada cara (familia, estilo, peso) una vez:
+#   - ui-fonts.css: caras incluidas en el repositorio (mantenidas a mano).
+#   - caras que piden los templates y no están en el repositorio: se descargan una
+#     sola vez a static/fonts/cache/<familia>/ y quedan registradas en fonts.css.
+# fonts.css y static/fonts/cache/ se generan al arrancar y no van al repositorio.
+#
+# Comprobar / descargar lo que falte:
+#   python fonts.py
+
+import re
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qs, quote_plus, urlsplit
+
+BASE_DIR      = Path(__file__).parent
+TEMPLATES_DIR = BASE_DIR / "templates"
+STATIC_DIR    = BASE_DIR / "static"
+FONTS_DIR     = STATIC_DIR / "fonts"
+UI_SHEET      = FONTS_DIR / "ui-fonts.css"
+MERGED_SHEET  = FONTS_DIR / "fonts.css"
+DOWNLOAD_DIR  = FONTS_DIR / "cache"
+FONTS_HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/120 Safari/537.36"}
+FONT_SUBSET   = "latin"                  # mismo subconjunto que las fuentes del repositorio
+
+_GOOGLE_LINK   = re.compile(r'<link[^>]+href="(https://fonts\.googleapis\.com/[^"]+)"[^>]*>')
+_GOOGLE_IMPORT = re.compile(r"@import url\('(https://fonts\.googleapis\.com/[^']+)'\);")
+_FONT_FACE     = re.compile(r'(?:/\*\s*([\w-]+)\s*\*/\s*)?@font-face\s*\{([^}]+)\}')
+
+
+# ── CARAS ──────────────────────────────────────────────────────────────────
+# Una cara es (familia, estilo, peso): ("EB Garamond", "italic", 400)
+
+def parse_google_url(url: str) -> set[tuple[str, str, int]]:
+    """Caras que pide una URL de Google Fonts (css2)."""
+    faces = set()
+    for spec in parse_qs(urlsplit(url).query).get("family", []):
+        family, _, axes = spec.partition(":")
+        if not axes:
+            faces.add((family, "normal", 400))
+            continue
+        names, _, values = axes.partition("@")
+        names = names.split(",")
+        for value in values.split(";"):
+            axis = dict(zip(names, value.split(",")))
+            style = "italic" if axis.get("ital") == "1" else "normal"
+            faces.add((family, style, int(axis.get("wght", 400))))
+    return faces
+
+
+def template_font_urls() -> set[str]:
+    """URLs de Google Fonts usadas en los templates de documentos."""
+    urls = set()
+    for path in [TEMPLATES_DIR / "base_document.html", *(TEMPLATES_DIR / "documents").glob("*.html")]:
+        html = path.read_text(encoding="utf-8")
+        urls.update(_GOOGLE_LINK.findall(html))
+        urls.update(_GOOGLE_IMPORT.findall(html))
+    return urls
+
+
+def required_faces() -> set[tuple[str, str, int]]:
+    """Todas las caras que piden los templates, sin repetir."""
+    return set().union(*(parse_google_url(url) for url in template_font_urls()))
+
+
+def _parse_sheet(css: str) -> dict[tuple[str, str, int], str]:
+    """{cara: ruta relativa a static/} de las @font-face de una hoja local."""
+    faces = {}
+    for _, body in _FONT_FACE.findall(css):
+        family = re.search(r"font-family:\s*['\"]?([^;'\"]+)", body)
+        src    = re.search(r"url\(['\"]?/static/([^'\")]+)", body)
+        if not (family and src):
+            continue
+        style  = re.search(r"font-style:\s*(\w+)", body)
+        weight = re.search(r"font-weight:\s*(\d+)", body)
+        face = (family.group(1).strip(), style.group(1) if style else "normal",
+                int(weight.group(1)) if weight else 400)
+        faces[face] = src.group(1)
+    return faces
+
+
+def local_faces() -> dict[tuple[str, str, int], str]:
+    """Caras disponibles en disco: las del repositorio y las descargadas antes."""
+    faces = {}
+    for sheet in (MERGED_SHEET, UI_SHEET):        # ui-fonts.css manda si hay duplicados
+        if sheet.exists():
+            faces.update(_parse_sheet(sheet.read_text(encoding="utf-8")))
+    return {face: rel for face, rel in faces.items() if (STATIC_DIR / rel).exists()}
+
+
+def missing_faces() -> set[tuple[str, str, int]]:
+    return required_faces() - local_faces().keys()
+
+
+# ── HOJA COMBINADA ─────────────────────────────────────────────────────────
+
+def _face_rule(face: tuple[str, str, int], rel: str) -> str:
+    family, style, weight = face
+    return (f"@font-face {{ font-family: '{family}'; font-style: {style}; font-weight: {weight}; "
+            f"src: url('/static/{rel}') format('woff2'); }}")
+
+
+def write_merged_sheet(faces: dict[tuple[str, str, int], str] | None = None):
+    """Regenera static/fonts/fonts.css con todas las caras locales, agrupadas por familia."""
+    faces = local_faces() if faces is None else faces
+    lines = ["/* Generado por fonts.py a partir de ui-fonts.css y de las fuentes descargadas.",
+             "   No editar a mano: añadir fuentes en ui-fonts.css o en los templates. */"]
+    for family in sorted({f[0] for f in faces}):
+        lines += ["", f"/* {family} */"]
+        lines += [_face_rule(face, faces[face]) for face in sorted(f for f in faces if f[0] == family)]
+    MERGED_SHEET.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    weasyprint_css.cache_clear()
+
+
+def _family_slug(family: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", family.lower()).strip("-")
+
+
+def sync(verbose: bool = True) -> set[tuple[str, str, int]]:
+    """Descarga de Google Fonts las caras que faltan (una petición por familia) y regenera
+    fonts.css. Devuelve las caras que siguen faltando."""
+    import requests as req
+
+    faces = local_faces()
+    missing = required_faces() - faces.keys()
+    by_family: dict[str, list[tuple[str, str, int]]] = {}
+    for face in missing:
+        by_family.setdefault(face[0], []).append(face)
+
+    for family, wanted in sorted(by_family.items()):
+        axes = ";".join(f"{int(style == 'italic')},{weight}" for _, style, weight in sorted(
+            wanted, key=lambda f: (f[1] == "italic", f[2])))
+        url = f"https://fonts.googleapis.com/css2?family={quote_plus(family)}:ital,wght@{axes}&display=swap"
+        slug = _family_slug(family)
+        try:
+            css = req.get(url, headers=FONTS_HEADERS, timeout=10).text
+            for subset, body in _FONT_FACE.findall(css):
+                if subset and subset != FONT_SUBSET:
+                    continue
+                woff_url = re.search(r"url\((https://[^)]+\.woff2)\)", body)
+                style    = re.search(r"font-style:\s*(\w+)", body).group(1)
+                weight   = int(re.search(r"font-weight:\s*(\d+)", body).group(1))
+                if not woff_url:
+                    continue
+                suffix = ("" if weight == 400 else str(weight)) + ("italic" if style == "italic" else "")
+                path = DOWNLOAD_DIR / slug / f"{slug}-{FONT_SUBSET}-{suffix or 'regular'}.woff2"
+                rel = path.relative_to(STATIC_DIR).as_posix()
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(req.get(woff_url.group(1), timeout=10).content)
+                faces[(family, style, weight)] = rel
+                if verbose:
+                    print(f"  ↓ {rel}")
+        except Exception as e:
+            print(f"  [!] No se pudieron descargar las fuentes de {family}: {e}")
+
+    write_merged_sheet(faces)
+    return required_faces() - faces.keys()
+
+
+# ── SUSTITUCIÓN EN LOS DOCUMENTOS ──────────────────────────────────────────
+
+@lru_cache(maxsize=None)
+def weasyprint_css(url: str) -> str:
+    """@font-face con rutas file:// de las caras que pide una URL de Google Fonts."""
+    faces = local_faces()
+    rules = [_face_rule(face, faces[face]) for face in sorted(parse_google_url(url)) if face in faces]
+    return "\n".join(rules).replace("/static/", f"{STATIC_DIR.as_uri()}/")
+
+
+def patch_fonts(html: str, for_weasyprint: bool = False) -> str:
+    """Sustituye <link> y @import de Google Fonts por las fuentes locales.
+
+    for_weasyprint=False (navegador): todos apuntan a la hoja combinada fonts.css,
+    que el navegador descarga una vez para todos los documentos.
+
+    for_weasyprint=True (PDF): se incrustan como <style> solo las caras que pide el
+    template, con rutas file://, para que WeasyPrint no resuelva nada externo.
+    """
+    if for_weasyprint:
+        html = _GOOGLE_LINK.sub(lambda m: f"<style>{weasyprint_css(m.group(1))}</style>", html)
+        return _GOOGLE_IMPORT.sub(lambda m: weasyprint_css(m.group(1)), html)
+
+    from assets import asset_url
+    href = asset_url("fonts/fonts.css")
+    html = _GOOGLE_LINK.sub(f'<link rel="stylesheet" href="{href}">', html)
+    return _GOOGLE_IMPORT.sub(f"@import url('{href}');", html)
+
+
+if __name__ == "__main__":
+    required = required_faces()
+    print(f"Caras pedidas por los templates: {len(required)}")
+    still_missing = sync()
+    for family, style, weight in sorted(still_missing):
+        print(f"  [!] Falta {family} {weight} {style}")
+    print(f"[OK] {MERGED_SHEET.relative_to(BASE_DIR)}: {len(local_faces())} caras locales")
@@ -6,14 +6,37 @@
 #   python generate.py power.manual_print
 #   python generate.py power.manual_print --view-id vwxxxxxxxx
 #   python generate.py rule.manual_print --output mi_doc.pdf
+#   python generate.py character.character_sheet --profile   # + informe .prof/.txt junto al PDF
+#   python generate.py power.cards_mobile edge.cards_mobile --jobs 2 --out-dir salida/
+#   python generate.py --all --watch --out-dir salida/        # regenera al editar templates o datos
 
 import argparse
+import contextlib
+import functools
+import importlib.util
+import os
 import re
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from html import escape as html_escape
 from pathlib import Path
 
 from jinja2 import Environment, FileSystemLoader
-from config import NOCODB_URL, API_TOKEN, TABLE_CONFIG, DOCUMENTS
-from nocodb_client import get_table, get_characters, get_bestiary_entries
+from config import NOCODB_URL, DOCUMENTS, DATA_CACHE_TTL, EXPORT_WORKERS, DECK_CACHE_MB, PREVIEW_PAGE_SIZE
+from nocodb_client import (get_table, get_table_views, get_characters, get_bestiary_entries, get_sources_version,
+                           get_views, reset_stale, stale_since, resolve_references, source_tables)
+from utils import wait_for_fonts
+from fonts import MERGED_SHEET, patch_fonts
+from images import patch_images
+from template_fields import used_fields
+from cache import SharedCache, SingleFlight, content_hash, file_version
+from metrics import span
 import markdown as _markdown_lib
 import requests as req
 
@@ -22,8 +45,6 @@ BASE_DIR        = Path(__file__).parent
 TEMPLATES_DIR   = BASE_DIR / "templates"
 DOCUMENTS_DIR   = TEMPLATES_DIR / "documents"
 STATIC_DIR      = BASE_DIR / "static"
-FONTS_CACHE_DIR = STATIC_DIR / "fonts" / "cache"
-FONTS_HEADERS   = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/120 Safari/537.36"}
 
 
 # ── DOCUMENTOS ─────────────────────────────────────────────────────────────
@@ -54,29 +75,137 @@ def make_jinja_env() -> Environment:
     return env
 
 
+_jinja_env: Environment | None = None
+
+
+def jinja_env() -> Environment:
+    """Entorno Jinja2 compartido: los templates se compilan una vez y se recargan si cambia el archivo."""
+    global _jinja_env
+    if _jinja_env is None:
+        _jinja_env = make_jinja_env()
+    return _jinja_env
+
+
+def preload_templates():
+    """Compila todos los templates HTML de DOCUMENTS (p.ej. antes de lanzar los trabajadores)."""
+    env = jinja_env()
+    for group in DOCUMENTS.values():
+        for doc in group.get("docs", {}).values():
+            if doc_type(doc) == "html":
+                env.get_template(doc["template"])
+
+
+PUBLIC_VIEW_PREFIX = "pub:"
+
+
 def resolve_view_name(table_key: str, view_id: str | None) -> str:
     if not view_id:
         return ""
     try:
-        table_id = TABLE_CONFIG[table_key]["table_id"]
-        r = req.get(f"{NOCODB_URL}/api/v2/meta/tables/{table_id}/views",
-                    headers={"xc-token": API_TOKEN}, timeout=5)
-        r.raise_for_status()
-        for v in r.json().get("list", []):
+        for v in get_views(table_key):
             if v["id"] == view_id:
-                return v["title"].removeprefix("pub:").strip()
+                return v["title"].removeprefix(PUBLIC_VIEW_PREFIX).strip()
     except Exception:
         pass
     return ""
 
 
-def get_data(table_key: str, view_id: str | None) -> list:
-    """Devuelve los datos de una tabla listos para el template."""
+def public_views(table_key: str) -> list[dict]:
+    """Vistas publicadas de una tabla (título con prefijo pub:), con el prefijo quitado."""
+    return [{"id": v["id"], "title": v["title"].removeprefix(PUBLIC_VIEW_PREFIX).strip()}
+            for v in get_views(table_key) if v["title"].startswith(PUBLIC_VIEW_PREFIX)]
+
+
+def get_data(table_key: str, view_id: str | None, fields=None) -> list:
+    """Devuelve los datos de una tabla listos para el template.
+    fields: campos que usa el documento (ver document_fields); None = todos."""
     if table_key == "character":
-        return [r for r in get_characters(view_id=view_id, full=True) if r.get("data")]
+        return resolve_references(get_characters(view_id=view_id, full=True))
     if table_key == "bestiary":
-        return get_bestiary_entries(view_id=view_id, full=True)
-    return get_table(table_key, view_id=view_id)
+        return resolve_references(get_bestiary_entries(view_id=view_id, full=True))
+    if fields is None:
+        return get_table(table_key, view_id=view_id)
+    try:
+        return get_table(table_key, view_id=view_id, fields=fields)
+    except req.HTTPError:
+        # Un campo del template que no existe en NocoDB no debe romper el documento
+        return get_table(table_key, view_id=view_id)
+
+
+def document_fields(doc: dict):
+    """Campos de los registros que usa un documento HTML, según el AST de su template.
+    None si no se pueden determinar (se piden todos)."""
+    if doc_type(doc) != "html" or not doc.get("data_key"):
+        return None
+    return used_fields(jinja_env(), doc["template"], doc["data_key"])
+
+
+def _template_files(doc: dict) -> list[Path]:
+    """Archivos de los que depende el aspecto de un documento."""
+    return [TEMPLATES_DIR / doc["template"], TEMPLATES_DIR / "base_document.html"]
+
+
+# Versión de los datos ya consultada en la petición actual, por tabla y vista: el ETag,
+# la clave de single_flight y el archivo generado la comparten en vez de preguntarla
+# cada uno. app.py la abre al empezar cada petición y la cierra al terminar; fuera de
+# una petición (CLI, pre-renders, hilos de exportación) se pregunta cada vez.
+_request_versions: ContextVar[dict | None] = ContextVar("request_versions", default=None)
+
+
+def begin_request_versions():
+    _request_versions.set({})
+
+
+def end_request_versions():
+    _request_versions.set(None)
+
+
+def sources_version(table_key: str, view_id: str | None = None) -> tuple[str, str] | None:
+    """get_sources_version, una sola vez por petición."""
+    versions = _request_versions.get()
+    if versions is None:
+        return get_sources_version(table_key, view_id)
+    if (table_key, view_id) not in versions:
+        versions[table_key, view_id] = get_sources_version(table_key, view_id)
+    return versions[table_key, view_id]
+
+
+def document_version(doc_id: str, fmt: str, view_id: str | None = None) -> tuple[str, datetime | None] | None:
+    """
+    Versión de un documento generado sin renderizarlo: template (y base_document.html)
+    + versión de los datos en NocoDB (la tabla, sus tablas enlazadas y las que sus fichas
+    referencian). Devuelve (etag, última modificación) o None si la versión de los datos
+    no se puede determinar.
+    """
+    doc, table_key = find_doc(doc_id)
+    if not doc:
+        return None
+    data_version = sources_version(table_key, view_id)
+    if data_version is None:
+        return None
+    templates = _template_files(doc)
+    etag = content_hash(doc_id, fmt, view_id, [file_version(p) for p in templates], data_version[0])
+
+    stamps = [p.stat().st_mtime for p in templates if p.exists()]
+    try:
+        stamps.append(datetime.fromisoformat(data_version[1]).timestamp())
+    except (TypeError, ValueError):
+        pass
+    last_modified = datetime.fromtimestamp(max(stamps), tz=timezone.utc) if stamps else None
+    return etag, last_modified
+
+
+def stale_notice(html: str, since: datetime | None) -> str:
+    """Si los datos son una copia antigua (NocoDB no respondía), añade un aviso fijo
+    en la esquina; WeasyPrint lo repite en cada página del PDF."""
+    if since is None:
+        return html
+    notice = ('<div style="position:fixed; top:2mm; right:2mm; z-index:9999; padding:1mm 2mm; '
+              'background:#fff3cd; color:#7a4b00; border:1px solid #e0b84c; font:8pt sans-serif;">'
+              f'Datos sin actualizar desde {since:%d/%m/%Y %H:%M} (NocoDB no respondía)</div>')
+    if "</body>" in html:
+        return html.replace("</body>", notice + "</body>", 1)
+    return html + notice
 
 
 def output_filename(doc_id: str, fmt: str, view_name: str = "") -> str:
@@ -85,139 +214,683 @@ def output_filename(doc_id: str, fmt: str, view_name: str = "") -> str:
     return f"{base}{suffix}.{fmt}"
 
 
-# ── FUENTES ────────────────────────────────────────────────────────────────
+# ── GENERADORES ────────────────────────────────────────────────────────────
 
-def _slug(google_fonts_url: str) -> str:
-    return re.sub(r'[^a-z0-9]', '_', google_fonts_url.lower())[:60]
+# Documentos generados (PDF y .docx) por documento, formato y vista, con la versión
+# (template + datos) con la que se generaron. Mientras no cambie se reutilizan.
+def _output_cache(doc_id: str) -> SharedCache:
+    return SharedCache(f"outputs/{doc_id}", default_ttl=None)
 
 
-def _patch_fonts(html: str, for_weasyprint: bool = False) -> str:
-    """Sustituye <link> y @import de Google Fonts por la caché local.
+# Renders en curso. Si varios jugadores piden a la vez el mismo documento, vista y
+# formato con los mismos datos, solo se genera una vez y todos reciben el resultado.
+_renders = SingleFlight()
 
-    for_weasyprint=False (navegador):
-        <link href="/static/fonts/cache/{slug}/fonts.css">
-        El navegador los resuelve vía Flask sin problema.
 
-    for_weasyprint=True (PDF):
-        Lee el fonts.css del disco, sustituye /static/ → file:// dentro del CSS
-        e incrusta el resultado como <style> en el HTML.
-        Así WeasyPrint no necesita resolver ningún archivo externo.
-    """
-    def _browser_href(url):
-        return f"/static/fonts/cache/{_slug(url)}/fonts.css"
-
-    def _inline_css(url):
-        css_path = FONTS_CACHE_DIR / _slug(url) / "fonts.css"
-        if not css_path.exists():
-            return ""
-        css = css_path.read_text(encoding="utf-8")
-        # /static/fonts/cache/... → file:///ruta/absoluta/static/fonts/cache/...
-        return css.replace("/static/", f"{STATIC_DIR.as_uri()}/")
-
-    if for_weasyprint:
-        def replace_link(m):
-            return f"<style>{_inline_css(m.group(1))}</style>"
-        def replace_import(m):
-            return _inline_css(m.group(1))
-    else:
-        def replace_link(m):
-            return f'<link rel="stylesheet" href="{_browser_href(m.group(1))}">'
-        def replace_import(m):
-            return f"@import url('{_browser_href(m.group(1))}');"
-
-    html = re.sub(
-        r'<link[^>]+href="(https://fonts\.googleapis\.com/[^"]+)"[^>]*>',
-        replace_link, html
-    )
-    html = re.sub(
-        r"@import url\('(https://fonts\.googleapis\.com/[^']+)'\);",
-        replace_import, html
-    )
-    return html
+def single_flight(fmt: str):
+    """Decorador para render_*(doc_id, view_id): agrupa renders simultáneos idénticos."""
+    def decorator(render):
+        @functools.wraps(render)
+        def wrapper(doc_id: str, view_id: str | None = None):
+            doc, table_key = find_doc(doc_id)
+            if not doc:
+                return render(doc_id, view_id)
+            data_version = sources_version(table_key, view_id)
+            result, _ = _renders.do((fmt, doc_id, view_id, data_version), lambda: render(doc_id, view_id))
+            return result
+        return wrapper
+    return decorator
 
 
-# ── GENERADORES ────────────────────────────────────────────────────────────
+# ── ARCHIVOS GENERADOS ─────────────────────────────────────────────────────
+# Los PDF y .docx se escriben directamente a disco, en la caché de documentos
+# generados (un archivo por documento, formato, vista y versión), y se descargan
+# desde ahí: el servidor los envía por trozos (sendfile con gunicorn), con soporte
+# de Range, sin cargarlos en memoria. Si la versión de los datos no se puede
+# determinar se generan en un archivo temporal que se borra tras enviarlo.
+
+class GeneratedFile:
+    """Documento generado en disco. etag=None: archivo temporal sin versión."""
+
+    __slots__ = ("path", "etag")
+
+    def __init__(self, path: Path, etag: str | None):
+        self.path = path
+        self.etag = etag
+
+    @property
+    def temporary(self) -> bool:
+        return self.etag is None
+
+    def discard(self):
+        """Borra el archivo si es temporal (en POSIX, quien ya lo tenga abierto puede seguir leyéndolo)."""
+        if self.temporary:
+            self.path.unlink(missing_ok=True)
+
+    def read_bytes(self) -> bytes:
+        data = self.path.read_bytes()
+        self.discard()
+        return data
+
+
+def _write_output(doc_id: str, write, view_id: str | None) -> Path:
+    """Ejecuta write(doc_id, view_id, archivo) sobre un archivo temporal de la caché del documento."""
+    directory = _output_cache(doc_id).path
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(doc_id, view_id, f)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return Path(tmp)
+
+
+# False mientras se genera sin cachés (render_pdf/render_docx con use_cache=False)
+_use_cache: ContextVar[bool] = ContextVar("use_cache", default=True)
+
+
+def _without_cache(func, *args):
+    """func(*args) sin reutilizar documentos, páginas ni .docx ya generados."""
+    token = _use_cache.set(False)
+    try:
+        return func(*args)
+    finally:
+        _use_cache.reset(token)
+
+
+def _generated_bytes(generated: GeneratedFile) -> bytes:
+    try:
+        return generated.read_bytes()
+    finally:
+        generated.discard()
+
+
+def generate_file(fmt: str, doc_id: str, view_id: str | None, write) -> GeneratedFile:
+    """El documento en disco para la versión actual de template y datos; lo genera
+    (una sola vez aunque lo pidan varios a la vez) si no existe."""
+    version = document_version(doc_id, fmt, view_id) if _use_cache.get() else None
+    if version is None:
+        return GeneratedFile(_write_output(doc_id, write, view_id), None)
+    etag = version[0]
+    directory = _output_cache(doc_id).path
+    prefix = f"{fmt}-{content_hash(view_id)[:16]}-"      # view_id viene de la URL: no va en la ruta
+    path = directory / f"{prefix}{etag}.{fmt}"
+    if path.exists():
+        return GeneratedFile(path, etag)
+
+    def produce():
+        tmp = _write_output(doc_id, write, view_id)
+        for old in directory.glob(f"{prefix}*.{fmt}"):
+            old.unlink(missing_ok=True)
+        os.replace(tmp, path)
+
+    _renders.do((fmt, doc_id, view_id, etag), produce)
+    return GeneratedFile(path, etag)
+
+
+def documents_for_table(table_key: str) -> list[str]:
+    """IDs de los documentos de DOCUMENTS que muestran datos de una tabla: los que se
+    generan a partir de ella y los que la referencian (ver source_tables)."""
+    return [f"{group_key}.{doc_key}"
+            for group_key, group in DOCUMENTS.items()
+            for doc_key in group.get("docs", {})
+            if table_key in source_tables(find_doc(f"{group_key}.{doc_key}")[1])]
+
+
+def invalidate_outputs(table_key: str) -> list[str]:
+    """Descarta los documentos generados que dependen de una tabla. Devuelve sus IDs."""
+    doc_ids = documents_for_table(table_key)
+    for doc_id in doc_ids:
+        _output_cache(doc_id).clear()
+    return doc_ids
+
+
+# Cola de pre-renders (un hilo: no compite con las peticiones por más de un núcleo)
+_prerender_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prerender")
+
+
+def queue_prerender(doc_ids: list[str]):
+    """Regenera en segundo plano la vista por defecto de cada documento (PDF o .docx)."""
+    for doc_id in doc_ids:
+        _prerender_pool.submit(_prerender, doc_id)
+
+
+def _prerender(doc_id: str):
+    doc, _ = find_doc(doc_id)
+    try:
+        if doc_type(doc) == "html":
+            pdf_file(doc_id).discard()
+        elif doc_type(doc) in ("docx", "md"):
+            docx_file(doc_id).discard()
+    except Exception as e:
+        print(f"  [!] Pre-render de {doc_id} fallido: {e}")
 
+
+@single_flight("html")
 def render_html(doc_id: str, view_id: str | None = None) -> str:
     """Renderiza un documento HTML con fuentes en /static/ (para el navegador)."""
+    doc, data, context = _browser_context(doc_id, view_id)
+    return _browser_html(doc, data, context)
+
+
+def _browser_context(doc_id: str, view_id: str | None) -> tuple[dict, list, dict]:
     doc, table_key = find_doc(doc_id)
     if not doc:
         raise ValueError(f"Documento '{doc_id}' no encontrado")
-    data = get_data(table_key, view_id)
-    view_name = resolve_view_name(table_key, view_id)
-    env = make_jinja_env()
-    template = env.get_template(doc["template"])
-    context = {"view_name": view_name, "nocodb_url": NOCODB_URL}
+    reset_stale()
+    with span("data"):
+        data = get_data(table_key, view_id, document_fields(doc))
+    with span("view_name"):
+        view_name = resolve_view_name(table_key, view_id)
+    return doc, data, {"view_name": view_name, "nocodb_url": NOCODB_URL, "stale_since": stale_since()}
+
+
+def _browser_html(doc: dict, data, context: dict) -> str:
+    template = jinja_env().get_template(doc["template"])
     if doc.get("data_key"):
-        context[doc["data_key"]] = data
-    return _patch_fonts(template.render(**context), for_weasyprint=False)
+        context = {**context, doc["data_key"]: data}
+    with span("jinja"):
+        html = stale_notice(template.render(**context), context["stale_since"])
+    with span("fonts"):
+        return patch_fonts(html, for_weasyprint=False)
+
+
+# ── PREVISUALIZACIÓN POR PARTES ────────────────────────────────────────────
+# En los documentos con "lazy_preview" (por defecto, las barajas) la previsualización
+# lleva solo los primeros registros y una marca al final: al acercarse a ella, el
+# navegador pide el siguiente trozo a /preview/<doc>/slice?offset=&limit=, que se
+# genera con los datos cacheados y el template ya compilado (solo el <body>).
+
+_BODY = re.compile(r"<body[^>]*>(.*)</body>", re.S)
+
+_PREVIEW_LOADER = """<script>
+(function () {
+  var more = document.getElementById('preview-more');
+  var next = +more.dataset.next, limit = +more.dataset.limit, total = +more.dataset.total;
+  var params = new URLSearchParams(location.search), busy = false;
+  var url = location.pathname.replace(/\\/$/, '') + '/slice';
+  var observer = new IntersectionObserver(function (entries) {
+    if (entries[0].isIntersecting) load();
+  }, {rootMargin: '1500px'});
+  function load() {
+    if (busy || next >= total) return;
+    busy = true;
+    params.set('offset', next);
+    params.set('limit', limit);
+    fetch(url + '?' + params).then(function (r) {
+      if (!r.ok) throw new Error(r.status);
+      return r.text();
+    }).then(function (html) {
+      more.insertAdjacentHTML('beforebegin', html);
+      next += limit;
+      busy = false;
+      if (next >= total) { observer.disconnect(); more.remove(); return; }
+      if (more.getBoundingClientRect().top < innerHeight + 1500) load();
+    }).catch(function () {
+      more.textContent = 'No se pudo cargar el resto del documento.';
+    });
+  }
+  observer.observe(more);
+})();
+</script>"""
+
+
+def lazy_preview(doc: dict) -> bool:
+    return (doc_type(doc) == "html" and bool(doc.get("data_key"))
+            and doc.get("lazy_preview", bool(doc.get("deck"))))
+
+
+def _slice_size(doc: dict, limit: int) -> int:
+    """Redondea un trozo a páginas completas de la baraja."""
+    per_page = doc.get("deck", {}).get("per_page", 1)
+    return max(per_page, -(-limit // per_page) * per_page)
+
+
+def _deck_records(doc: dict, data: list) -> list:
+    required = doc.get("deck", {}).get("required")
+    return [record for record in data if record.get(required)] if required else data
+
+
+@single_flight("preview")
+def render_preview(doc_id: str, view_id: str | None = None) -> str:
+    """Previsualización: como render_html, pero en los documentos con "lazy_preview"
+    solo con los primeros registros y el código que carga el resto al hacer scroll."""
+    doc, data, context = _browser_context(doc_id, view_id)
+    if not lazy_preview(doc):
+        return _browser_html(doc, data, context)
+    data = _deck_records(doc, data)
+    limit = _slice_size(doc, PREVIEW_PAGE_SIZE)
+    html = _browser_html(doc, data[:limit], context)
+    if len(data) <= limit:
+        return html
+    loader = (f'<div id="preview-more" data-next="{limit}" data-limit="{limit}" data-total="{len(data)}" '
+              f'style="padding:2rem; text-align:center; font:12px sans-serif; color:#888;">Cargando…</div>'
+              + _PREVIEW_LOADER)
+    if "</body>" in html:
+        return html.replace("</body>", loader + "</body>", 1)
+    return html + loader
+
+
+def render_slice(doc_id: str, view_id: str | None, offset: int, limit: int) -> str:
+    """HTML (contenido del <body>) de los registros [offset, offset + limit) de la previsualización."""
+    doc, data, context = _browser_context(doc_id, view_id)
+    if not lazy_preview(doc):
+        raise ValueError(f"'{doc_id}' no se previsualiza por partes")
+    data = _deck_records(doc, data)
+    template = jinja_env().get_template(doc["template"])
+    context[doc["data_key"]] = data[offset:offset + _slice_size(doc, limit)]
+    with span("jinja"):
+        html = template.render(**context)
+    body = _BODY.search(html)
+    return body.group(1) if body else html
+
+
+def pdf_file(doc_id: str, view_id: str | None = None) -> GeneratedFile:
+    """Genera un PDF (o reutiliza el ya generado) con fuentes incrustadas como <style file://>."""
+    return generate_file("pdf", doc_id, view_id, _write_pdf)
+
+
+def render_pdf(doc_id: str, view_id: str | None = None, use_cache: bool = True) -> bytes:
+    """El PDF en memoria (CLI, benchmarks). Las descargas usan pdf_file.
+    use_cache=False lo genera de cero (para perfilar y medir el render de verdad)."""
+    if not use_cache:
+        return _without_cache(render_pdf, doc_id, view_id)
+    return _generated_bytes(pdf_file(doc_id, view_id))
+
+
+def _write_pdf(doc_id: str, view_id: str | None, target):
+    doc, _ = find_doc(doc_id)
+    if doc and doc.get("linearize") and has_pikepdf():
+        with tempfile.TemporaryFile() as raw:
+            _write_pdf_layout(doc, doc_id, view_id, raw)
+            raw.seek(0)
+            with span("linearize"):
+                linearize(raw, target)
+        return
+    _write_pdf_layout(doc, doc_id, view_id, target)
+
+
+def _write_pdf_layout(doc: dict | None, doc_id: str, view_id: str | None, target):
+    if doc and doc.get("deck"):
+        return _render_deck(doc_id, view_id, target)
+    document = _layout_pdf(_pdf_html(doc_id, view_id))
+    with span("pdf_write"):
+        document.write_pdf(target)
 
 
-def render_pdf(doc_id: str, view_id: str | None = None) -> bytes:
-    """Genera un PDF con fuentes incrustadas como <style file://> para WeasyPrint."""
+# ── PDF LINEALIZADO ────────────────────────────────────────────────────────
+# Documentos con "linearize" en DOCUMENTS (los de móvil): el PDF se reescribe con
+# pikepdf (qpdf) linealizado y con flujos de objetos. La primera página y lo que
+# necesita van al principio del archivo, así que un visor que lo abre por partes
+# (peticiones Range) la muestra tras los primeros kilobytes. Sin pikepdf se sirve
+# el PDF tal cual.
+
+@functools.lru_cache(maxsize=None)
+def has_pikepdf() -> bool:
+    return importlib.util.find_spec("pikepdf") is not None
+
+
+def linearize(source, target):
+    """Copia el PDF de `source` a `target` linealizado ("vista web rápida")."""
+    import pikepdf
+    with pikepdf.open(source) as pdf:
+        pdf.save(target, linearize=True, compress_streams=True,
+                 object_stream_mode=pikepdf.ObjectStreamMode.generate)
+
+
+def _pdf_html(doc_id: str, view_id: str | None) -> str:
+    """HTML de un documento listo para WeasyPrint (fuentes locales incrustadas)."""
+    doc, table_key = _html_doc(doc_id)
+    reset_stale()
+    with span("data"):
+        data = get_data(table_key, view_id, document_fields(doc))
+    with span("view_name"):
+        view_name = resolve_view_name(table_key, view_id)
+    return _weasyprint_html(doc, data, view_name, stale_since())
+
+
+def _html_doc(doc_id: str) -> tuple[dict, str]:
     doc, table_key = find_doc(doc_id)
     if not doc:
         raise ValueError(f"Documento '{doc_id}' no encontrado")
     if doc_type(doc) != "html":
         raise ValueError(f"'{doc_id}' no es un documento HTML")
-    from weasyprint import HTML
-    data = get_data(table_key, view_id)
-    view_name = resolve_view_name(table_key, view_id)
-    env = make_jinja_env()
-    template = env.get_template(doc["template"])
-    context = {"view_name": view_name, "nocodb_url": NOCODB_URL}
+    return doc, table_key
+
+
+def _weasyprint_html(doc: dict, data, view_name: str, stale: datetime | None) -> str:
+    template = jinja_env().get_template(doc["template"])
+    context = {"view_name": view_name, "nocodb_url": NOCODB_URL, "stale_since": stale}
     if doc.get("data_key"):
         context[doc["data_key"]] = data
-    html = _patch_fonts(template.render(**context), for_weasyprint=True)
-    return HTML(string=html, base_url=str(BASE_DIR)).write_pdf()
+    with span("jinja"):
+        html = stale_notice(template.render(**context), stale)
+    with span("fonts"):
+        wait_for_fonts()
+        return patch_images(patch_fonts(html, for_weasyprint=True))
 
 
-def render_docx(doc_id: str, view_id: str | None = None) -> bytes:
-    """Genera un .docx a partir de un template .docx (docxtpl) o .md (Jinja2+pypandoc)."""
-    from docx_generator import render_docx_template, render_md_template
+def _layout_pdf(html: str, font_config=None):
+    from weasyprint import HTML
+    with span("layout"):
+        return HTML(string=html, base_url=str(BASE_DIR)).render(font_config=font_config)
+
+
+def docx_file(doc_id: str, view_id: str | None = None) -> GeneratedFile:
+    """Genera un .docx (o reutiliza el ya generado) en disco."""
+    return generate_file("docx", doc_id, view_id,
+                         lambda doc_id, view_id, target: target.write(_docx_bytes(doc_id, view_id)))
+
+
+def render_docx(doc_id: str, view_id: str | None = None, use_cache: bool = True) -> bytes:
+    """El .docx en memoria (CLI, benchmarks). Las descargas usan docx_file.
+    use_cache=False lo genera de cero, como render_pdf."""
+    if not use_cache:
+        return _without_cache(render_docx, doc_id, view_id)
+    return _generated_bytes(docx_file(doc_id, view_id))
+
+
+def _docx_bytes(doc_id: str, view_id: str | None) -> bytes:
+    """Genera un .docx a partir de un template .docx (docxtpl) o .md (Jinja2+pypandoc).
+    No guarda nada: el resultado se queda en disco a través de docx_file."""
     doc, table_key = find_doc(doc_id)
     if not doc:
         raise ValueError(f"Documento '{doc_id}' no encontrado")
     dtype = doc_type(doc)
     if dtype not in ("docx", "md"):
         raise ValueError(f"'{doc_id}' no es un documento Word")
-    data = get_data(table_key, view_id)
-    view_name = resolve_view_name(table_key, view_id)
-    context = {doc["data_key"]: data, "view_name": view_name, "titulo": doc["label"]}
+    reset_stale()
+    with span("data"):
+        data = get_data(table_key, view_id, document_fields(doc))
+    with span("view_name"):
+        view_name = resolve_view_name(table_key, view_id)
+    context = {doc["data_key"]: data, "view_name": view_name, "titulo": doc["label"],
+               "stale_since": stale_since()}
     template_path = DOCUMENTS_DIR / Path(doc["template"]).name
-    if dtype == "md":
-        return render_md_template(template_path, context)
-    return render_docx_template(template_path, context)
+    from docx_generator import render_docx_template, render_md_template
+    with span("docx"):
+        if dtype == "md":
+            return render_md_template(template_path, context)
+        return render_docx_template(template_path, context)
+
+
+# ── BARAJAS ────────────────────────────────────────────────────────────────
+# Documentos con "deck" en DOCUMENTS: cada grupo de `per_page` registros ocupa sus
+# propias páginas. Cada grupo se maqueta por separado y su PDF se guarda en disco,
+# junto a los documentos generados, con su contenido (registros + template + vista)
+# como nombre: al editar una carta solo se vuelve a maquetar su página y el PDF se
+# compone con pikepdf a partir de las demás, que comparten todos los trabajadores.
+# Cada baraja ocupa como mucho SAVAGEPY_DECK_CACHE_MB; se descartan primero las
+# páginas usadas hace más tiempo. Sin pikepdf la baraja se maqueta entera.
+
+def _render_deck(doc_id: str, view_id: str | None, target):
+    doc, table_key = _html_doc(doc_id)
+    reset_stale()
+    with span("data"):
+        data = get_data(table_key, view_id, document_fields(doc))
+    with span("view_name"):
+        view_name = resolve_view_name(table_key, view_id)
+    stale = stale_since()
+
+    per_page = doc["deck"].get("per_page", 1)
+    data = _deck_records(doc, data)
+    if not data or not has_pikepdf():
+        document = _layout_pdf(_weasyprint_html(doc, data, view_name, stale))
+        with span("pdf_write"):
+            return document.write_pdf(target)
+
+    from weasyprint.text.fonts import FontConfiguration
+    version = [doc_id, view_name, str(stale), [file_version(p) for p in _template_files(doc)],
+               file_version(MERGED_SHEET)]
+    directory = _output_cache(doc_id).path / "deck"
+    directory.mkdir(parents=True, exist_ok=True)
+    font_config = None
+    paths = []
+    for start in range(0, len(data), per_page):
+        chunk = data[start:start + per_page]
+        path = directory / f"{content_hash(version, chunk)}.pdf"
+        if _use_cache.get() and path.exists():
+            os.utime(path)                                   # recién usada: se descarta la última
+        else:
+            font_config = font_config or FontConfiguration()
+            document = _layout_pdf(_weasyprint_html(doc, chunk, view_name, stale), font_config)
+            with span("pdf_write"):
+                _write_atomic(path, document.write_pdf)
+        paths.append(path)
+
+    with span("pdf_write"):
+        merge_pdfs(paths, target)
+    _trim_deck(directory)
+
+
+def _write_atomic(path: Path, write):
+    """write(archivo) en un temporal del mismo directorio que luego se renombra a `path`."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def merge_pdfs(paths: list[Path], target):
+    """Une los PDF de `paths`, en orden, en `target`."""
+    import pikepdf
+    with contextlib.ExitStack() as stack, pikepdf.new() as pdf:
+        for path in paths:
+            part = stack.enter_context(pikepdf.open(path))   # abierto hasta guardar el resultado
+            pdf.pages.extend(part.pages)
+        pdf.save(target, compress_streams=True, object_stream_mode=pikepdf.ObjectStreamMode.generate)
+
+
+def _trim_deck(directory: Path):
+    """Borra las páginas usadas hace más tiempo mientras la baraja pase de DECK_CACHE_MB."""
+    entries = []
+    for path in directory.glob("*.pdf"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:                            # otro trabajador ya la borró
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= DECK_CACHE_MB * 1024 * 1024:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+# ── EXPORTACIÓN POR VISTAS ─────────────────────────────────────────────────
+# Un documento para cada vista pública de su tabla en un solo trabajo: los datos de
+# todas las vistas se descargan a la vez (compartiendo los registros relacionados)
+# y los .docx y el HTML de cada vista se generan en paralelo. WeasyPrint no garantiza
+# que se pueda usar desde varios hilos a la vez, así que los PDF se maquetan de uno
+# en uno. Resultado: un ZIP o un PDF con un marcador por vista.
+
+def _prefetch_views(doc: dict, table_key: str, view_ids: list[str]):
+    """Deja en la caché los datos de todas las vistas antes de renderizar. Antes se
+    consulta la versión de cada vista: si no, la primera consulta del render (sin
+    versión anterior anotada) descartaría lo que se acaba de descargar."""
+    if DATA_CACHE_TTL <= 0:                                  # sin caché no hay dónde dejarlos
+        return
+    with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as pool:
+        list(pool.map(lambda view_id: get_sources_version(table_key, view_id), view_ids))
+    if table_key in ("character", "bestiary"):
+        with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as pool:
+            list(pool.map(lambda view_id: get_data(table_key, view_id), view_ids))
+    else:
+        get_table_views(table_key, view_ids, document_fields(doc), workers=EXPORT_WORKERS)
 
 
-# ── CLI ────────────────────────────────────────────────────────────────────
+def _export_views(doc_id: str) -> tuple[dict, list[dict]]:
+    doc, table_key = find_doc(doc_id)
+    if not doc:
+        raise ValueError(f"Documento '{doc_id}' no encontrado")
+    views = public_views(table_key)
+    if not views:
+        raise ValueError(f"La tabla '{table_key}' no tiene vistas públicas ({PUBLIC_VIEW_PREFIX}...)")
+    _prefetch_views(doc, table_key, [v["id"] for v in views])
+    return doc, views
+
+
+def views_file(doc_id: str, bundle: str) -> GeneratedFile:
+    """El documento de cada vista pública en un archivo temporal: "zip" o "pdf"."""
+    write = _write_views_zip if bundle == "zip" else _write_views_pdf
+    return GeneratedFile(_write_output(doc_id, lambda doc_id, _, target: write(doc_id, target), None), None)
+
+
+def _write_views_zip(doc_id: str, target):
+    """ZIP con el documento (PDF o .docx) de cada vista pública."""
+    doc, views = _export_views(doc_id)
+    fmt, generate = ("pdf", pdf_file) if doc_type(doc) == "html" else ("docx", docx_file)
+    workers = 1 if fmt == "pdf" else EXPORT_WORKERS          # PDF: de uno en uno (ver arriba)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outputs = list(pool.map(lambda v: generate(doc_id, view_id=v["id"]), views))
+    try:
+        with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zf:
+            for view, output in zip(views, outputs):
+                zf.write(output.path, output_filename(doc_id, fmt, view["title"]))
+    finally:
+        for output in outputs:
+            output.discard()
 
-def main():
-    parser = argparse.ArgumentParser(description="Generador de documentos Savage Worlds")
-    parser.add_argument("doc_id", help="ID del documento (formato grupo.clave, ej: power.manual_print)")
-    parser.add_argument("--view-id", default=None, help="ID de vista NocoDB (opcional)")
-    parser.add_argument("--output", default=None, help="Ruta de salida (opcional)")
-    args = parser.parse_args()
 
-    doc, table_key = find_doc(args.doc_id)
-    if not doc:
-        print(f"[!] Documento '{args.doc_id}' no encontrado en config.py")
-        return
+def _write_views_pdf(doc_id: str, target):
+    """Un solo PDF con el documento de cada vista pública, con un marcador por vista."""
+    doc, views = _export_views(doc_id)
+    if doc_type(doc) != "html":
+        raise ValueError(f"'{doc_id}' no es un documento HTML")
 
-    view_name = resolve_view_name(table_key, args.view_id)
-    dtype = doc_type(doc)
+    def view_html(view):
+        html = _pdf_html(doc_id, view["id"])
+        label = html_escape('"' + view["title"].replace("\\", "\\\\").replace('"', '\\"') + '"')
+        # Marcador de la vista en el nivel 1; los títulos del documento quedan debajo
+        marker = (f'<style>h1{{bookmark-level:2}} h2{{bookmark-level:3}} h3{{bookmark-level:4}}</style>'
+                  f'<div style="bookmark-level:1; bookmark-label:{label}; height:0"></div>')
+        return re.sub(r"(<body[^>]*>)", lambda m: m.group(1) + marker, html, count=1)
+
+    with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as pool:
+        htmls = list(pool.map(view_html, views))
+    documents = [_layout_pdf(html) for html in htmls]            # de una en una (ver arriba)
+    pages = [page for document in documents for page in document.pages]
+    with span("pdf_write"):
+        documents[0].copy(pages).write_pdf(target)
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────
 
+def _cli_render(doc_id: str, view_id: str | None, output: Path | None, out_dir: Path, profile: bool) -> bool:
+    """Genera un documento a disco. Devuelve False (y lo explica) si no se pudo."""
+    doc, table_key = find_doc(doc_id)
+    if not doc:
+        print(f"[!] Documento '{doc_id}' no encontrado en config.py")
+        return False
+    dtype = doc_type(doc)
     if dtype == "html":
-        fmt, data = "pdf", render_pdf(args.doc_id, view_id=args.view_id)
+        fmt, render, generate = "pdf", render_pdf, pdf_file
     elif dtype in ("docx", "md"):
-        fmt, data = "docx", render_docx(args.doc_id, view_id=args.view_id)
+        fmt, render, generate = "docx", render_docx, docx_file
     else:
         print(f"[!] Tipo de template desconocido: {dtype}")
-        return
+        return False
 
-    out_path = Path(args.output) if args.output else Path(output_filename(args.doc_id, fmt, view_name))
-    out_path.write_bytes(data)
+    try:
+        view_name = resolve_view_name(table_key, view_id)
+        out_path = output or out_dir / output_filename(doc_id, fmt, view_name)
+        if profile:
+            from profiling import run_profiled, save_profile
+            data, profiler = run_profiled(render, doc_id, view_id=view_id, use_cache=False)
+            out_path.write_bytes(data)
+        else:
+            generated = generate(doc_id, view_id)
+            shutil.copyfile(generated.path, out_path)
+            generated.discard()
+    except Exception as e:
+        print(f"[!] {doc_id}: {e}")
+        return False
     print(f"[OK] {out_path.resolve()}")
+    if profile:
+        print(save_profile(profiler, out_path))
+        print(f"[OK] {out_path.resolve()}.prof")
+    return True
+
+
+def _run_jobs(doc_ids: list[str], jobs: int, **options) -> bool:
+    """Genera varios documentos, hasta `jobs` a la vez, en este mismo proceso (comparten
+    datos cacheados, templates compilados y fuentes)."""
+    with ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="cli") as pool:
+        return all(pool.map(lambda doc_id: _cli_render(doc_id, **options), doc_ids))
+
+
+def _watch_state(doc_id: str, view_id: str | None):
+    """(versiones de los templates, versión de los datos) de un documento."""
+    doc, table_key = find_doc(doc_id)
+    return [file_version(p) for p in _template_files(doc)], get_sources_version(table_key, view_id)
+
+
+def watch(doc_ids: list[str], interval: float, jobs: int, **options):
+    """Vigila templates y datos y regenera solo los documentos afectados."""
+    view_id = options["view_id"]
+    doc_ids = [doc_id for doc_id in doc_ids if find_doc(doc_id)[0]]
+    states = {doc_id: _watch_state(doc_id, view_id) for doc_id in doc_ids}
+    print(f"Vigilando {len(doc_ids)} documento(s) cada {interval:g} s (Ctrl+C para salir)")
+    try:
+        while True:
+            time.sleep(interval)
+            changed = []
+            for doc_id in doc_ids:
+                # get_sources_version ya descarta la caché de la tabla si los datos cambiaron
+                templates, data_version = _watch_state(doc_id, view_id)
+                if data_version is None:                    # NocoDB no responde: esperar
+                    data_version = states[doc_id][1]
+                if (templates, data_version) != states[doc_id]:
+                    states[doc_id] = (templates, data_version)
+                    changed.append(doc_id)
+            if changed:
+                print(f"Cambios: {', '.join(changed)}")
+                _run_jobs(changed, jobs, **options)
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de documentos Savage Worlds")
+    parser.add_argument("doc_ids", nargs="*", metavar="doc_id",
+                        help="ID(s) del documento (formato grupo.clave, ej: power.manual_print)")
+    parser.add_argument("--all", action="store_true", help="Todos los documentos de config.py")
+    parser.add_argument("--view-id", default=None, help="ID de vista NocoDB (opcional)")
+    parser.add_argument("--output", default=None, help="Ruta de salida (opcional, solo con un documento)")
+    parser.add_argument("--out-dir", default=".", help="Directorio de salida (por defecto, el actual)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Documentos generados a la vez")
+    parser.add_argument("--watch", action="store_true",
+                        help="Seguir en marcha y regenerar al cambiar un template o los datos")
+    parser.add_argument("--interval", type=float, default=2.0, help="Segundos entre comprobaciones con --watch")
+    parser.add_argument("--profile", action="store_true",
+                        help="Perfilar el render con cProfile y guardar el informe junto al archivo generado")
+    args = parser.parse_args()
+
+    doc_ids = list(args.doc_ids)
+    if args.all:
+        doc_ids += [f"{group_key}.{doc_key}" for group_key, group in DOCUMENTS.items()
+                    for doc_key in group.get("docs", {}) if f"{group_key}.{doc_key}" not in doc_ids]
+    if not doc_ids:
+        parser.error("indica al menos un documento o --all")
+    if args.output and len(doc_ids) > 1:
+        parser.error("--output solo con un documento; usa --out-dir")
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    options = {"view_id": args.view_id, "output": Path(args.output) if args.output else None,
+               "out_dir": out_dir, "profile": args.profile}
+    ok = _run_jobs(doc_ids, args.jobs, **options)
+    if args.watch:
+        watch(doc_ids, args.interval, args.jobs, **options)
+    elif not ok:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
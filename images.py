@@ -0,0 +1,145 @@
+# images.py
+# Imágenes que suben los usuarios (personajes y criaturas).
+#
+# Antes de enviarlas a NocoDB se normalizan: orientación EXIF aplicada, sin
+# metadatos, como máximo MAX_SIDE px de lado y recodificadas en WebP. El archivo se
+# llama como el hash de su contenido, así que si el registro ya tiene esa misma
+# imagen no se vuelve a subir. Las que pasan de SAVAGEPY_MAX_UPLOAD_MB o de
+# MAX_PIXELS se rechazan antes de descomprimirlas.
+#
+# Al subirlas se generan también dos miniaturas locales (en CACHE_DIR/images/):
+#   list  — para los listados de la interfaz
+#   print — para los documentos (WeasyPrint la lee del disco, sin descargarla)
+# Las imágenes sin miniatura (subidas antes o desde NocoDB) siguen usando la URL de NocoDB.
+
+import hashlib
+import io
+import re
+from pathlib import Path
+
+from config import CACHE_DIR, MAX_UPLOAD_MB
+
+IMAGES_DIR    = Path(CACHE_DIR) / "images"
+IMAGES_PREFIX = "/images/"
+MAX_SIDE      = 1600
+MAX_BYTES     = int(MAX_UPLOAD_MB * 1024 * 1024)
+MAX_PIXELS    = 50_000_000                               # por encima se rechaza sin descomprimirla
+FORM_MARGIN   = 1024 * 1024                              # resto del formulario (JSON de la ficha)
+QUALITY       = 82
+VARIANTS      = {"list": 256, "print": 1200}              # nombre → lado máximo en px
+CACHE_SECONDS = 365 * 24 * 3600
+
+_HASHED_TITLE = re.compile(r"^([0-9a-f]{20})\.(?:webp|jpg|png)$")
+
+
+class UploadedImage:
+    """Imagen lista para subir: contenido normalizado, nombre por hash y tipo MIME."""
+
+    __slots__ = ("content", "digest", "filename", "mimetype")
+
+    def __init__(self, content: bytes, suffix: str, mimetype: str):
+        self.content  = content
+        self.digest   = hashlib.sha256(content).hexdigest()[:20]
+        self.filename = f"{self.digest}{suffix}"
+        self.mimetype = mimetype
+
+
+# ── NORMALIZACIÓN ──────────────────────────────────────────────────────────
+
+def _encode(img, max_side: int) -> tuple[bytes, str, str]:
+    """(bytes, sufijo, mimetype) de la imagen reducida a max_side, en WebP si Pillow lo admite."""
+    from PIL import Image, features
+    img = img.copy()
+    img.thumbnail((max_side, max_side), Image.LANCZOS)
+    out = io.BytesIO()
+    if features.check("webp"):
+        img.save(out, "WEBP", quality=QUALITY, method=6)
+        return out.getvalue(), ".webp", "image/webp"
+    if img.mode == "RGBA":
+        img.save(out, "PNG", optimize=True)
+        return out.getvalue(), ".png", "image/png"
+    img.save(out, "JPEG", quality=QUALITY, optimize=True, progressive=True)
+    return out.getvalue(), ".jpg", "image/jpeg"
+
+
+def ingest(stream, filename: str, mimetype: str | None) -> UploadedImage:
+    """Normaliza una imagen subida y genera sus miniaturas. Sin Pillow se sube tal cual.
+    Lanza ValueError si el archivo no es una imagen o es demasiado grande."""
+    raw = stream.read(MAX_BYTES + 1)
+    if len(raw) > MAX_BYTES:
+        raise ValueError(f"'{filename}' ocupa más de {MAX_UPLOAD_MB:g} MB")
+    try:
+        from PIL import Image, ImageOps, UnidentifiedImageError
+    except ImportError:
+        return UploadedImage(raw, Path(filename).suffix.lower(), mimetype or "application/octet-stream")
+
+    try:
+        img = Image.open(io.BytesIO(raw))                # solo lee la cabecera
+        if img.width * img.height > MAX_PIXELS:
+            raise ValueError(f"'{filename}' es demasiado grande ({img.width}×{img.height} px)")
+        img = ImageOps.exif_transpose(img)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"'{filename}' no es una imagen válida") from e
+    has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+    img = img.convert("RGBA" if has_alpha else "RGB")
+    img.info = {}                                        # sin EXIF, ICC ni comentarios
+
+    image = UploadedImage(*_encode(img, MAX_SIDE))
+    IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+    for variant, side in VARIANTS.items():
+        if not _variant_path(image.digest, variant):
+            content, suffix, _ = _encode(img, side)
+            (IMAGES_DIR / f"{image.digest}-{variant}{suffix}").write_bytes(content)
+    return image
+
+
+# ── ADJUNTOS DE NOCODB ─────────────────────────────────────────────────────
+
+def attachment_digest(attachments: list) -> str | None:
+    """Hash de la imagen adjunta si se subió normalizada (nombre = hash del contenido)."""
+    if attachments:
+        match = _HASHED_TITLE.match(attachments[0].get("title") or "")
+        if match:
+            return match.group(1)
+    return None
+
+
+def already_attached(attachments: list, image: UploadedImage) -> bool:
+    return attachment_digest(attachments) == image.digest
+
+
+def _variant_path(digest: str, variant: str) -> Path | None:
+    for suffix in (".webp", ".jpg", ".png"):
+        path = IMAGES_DIR / f"{digest}-{variant}{suffix}"
+        if path.is_file():
+            return path
+    return None
+
+
+def variant_url(attachments: list, variant: str) -> str | None:
+    """/images/<hash>-<variante> si existe la miniatura local de la imagen adjunta."""
+    digest = attachment_digest(attachments)
+    path = _variant_path(digest, variant) if digest else None
+    return f"{IMAGES_PREFIX}{path.name}" if path else None
+
+
+def patch_images(html: str) -> str:
+    """Para WeasyPrint: las miniaturas locales se leen del disco (file://)."""
+    return html.replace(f'src="{IMAGES_PREFIX}', f'src="{IMAGES_DIR.resolve().as_uri()}/')
+
+
+# ── SERVIDOR ───────────────────────────────────────────────────────────────
+
+def serve_image(filename: str):
+    """Sirve una miniatura: el nombre lleva el hash, así que la caché es inmutable."""
+    from flask import send_from_directory
+    response = send_from_directory(IMAGES_DIR, filename, max_age=CACHE_SECONDS, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_app(app):
+    """Registra /images/<archivo> y limita el tamaño de las peticiones (413 si se pasan)."""
+    app.config["MAX_CONTENT_LENGTH"] = MAX_BYTES + FORM_MARGIN
+    app.add_url_rule(f"{IMAGES_PREFIX}<filename>", "images", serve_image)
@@ -0,0 +1,162 @@
+# metrics.py
+# Medición por etapas de los renders: cabecera Server-Timing por petición e
+# histogramas acumulados en formato Prometheus para /api/metrics.
+#
+# Uso:
+#     with span("jinja"):
+#         html = template.render(...)
+#     count_upstream()          # una llamada más a NocoDB en el render actual
+#
+# Fuera de una petición medida (CLI, scripts) span() no registra nada.
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from cache import SharedCache
+
+# Límites superiores de los buckets de los histogramas (segundos / nº de llamadas)
+TIME_BUCKETS  = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+CALLS_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+HISTOGRAMS = {
+    "savagepy_render_seconds":           ("Duración total de la petición de render", TIME_BUCKETS),
+    "savagepy_render_stage_seconds":     ("Duración de cada etapa del render", TIME_BUCKETS),
+    "savagepy_nocodb_calls_per_render":  ("Llamadas a NocoDB por render", CALLS_BUCKETS),
+}
+
+_current: ContextVar["RenderTimings | None"] = ContextVar("render_timings", default=None)
+
+# Histogramas de este proceso: nombre → {(etiquetas...): [conteos por bucket..., suma, total]}
+_local: dict[str, dict[tuple, list]] = {name: {} for name in HISTOGRAMS}
+_lock = threading.Lock()
+
+# Cada proceso publica aquí su copia para que /api/metrics sume todos los trabajadores
+_snapshots = SharedCache("metrics", default_ttl=None)
+
+
+class RenderTimings:
+    """Tiempos acumulados por etapa y llamadas a NocoDB de una petición."""
+    __slots__ = ("started", "stages", "upstream_calls")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.upstream_calls = 0
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Valor de la cabecera Server-Timing (duraciones en ms)."""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        parts.append(f'nocodb-calls;desc="{self.upstream_calls}"')
+        parts.append(f"total;dur={self.total() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+# ── REGISTRO ───────────────────────────────────────────────────────────────
+
+def begin() -> RenderTimings:
+    """Empieza a medir la petición actual."""
+    timings = RenderTimings()
+    _current.set(timings)
+    return timings
+
+
+def current() -> RenderTimings | None:
+    return _current.get()
+
+
+def end(timings: RenderTimings, route: str):
+    """Cierra la medición: vuelca los tiempos a los histogramas y los publica."""
+    _current.set(None)
+    with _lock:
+        _observe("savagepy_render_seconds", (route,), timings.total())
+        for stage, seconds in timings.stages.items():
+            _observe("savagepy_render_stage_seconds", (stage,), seconds)
+        _observe("savagepy_nocodb_calls_per_render", (route,), timings.upstream_calls)
+        try:
+            _snapshots.set(str(os.getpid()), _local)
+        except OSError:
+            pass
+
+
+@contextmanager
+def span(name: str):
+    """Mide un bloque y lo suma a la etapa `name` del render en curso."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def count_upstream(n: int = 1):
+    """Suma n llamadas a NocoDB al render en curso."""
+    timings = _current.get()
+    if timings is not None:
+        timings.upstream_calls += n
+
+
+def reset():
+    """Borra los histogramas publicados (al arrancar el servidor, antes de crear trabajadores)."""
+    with _lock:
+        for series in _local.values():
+            series.clear()
+        _snapshots.clear()
+
+
+def _observe(name: str, labels: tuple, value: float):
+    buckets = HISTOGRAMS[name][1]
+    series = _local[name].setdefault(labels, [0] * len(buckets) + [0.0, 0])
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            series[i] += 1
+    series[-2] += value
+    series[-1] += 1
+
+
+# ── EXPOSICIÓN ─────────────────────────────────────────────────────────────
+
+_LABEL_NAMES = {
+    "savagepy_render_seconds":          ("route",),
+    "savagepy_render_stage_seconds":    ("stage",),
+    "savagepy_nocodb_calls_per_render": ("route",),
+}
+
+
+def prometheus_text() -> str:
+    """Histogramas de todos los procesos sumados, en formato de texto de Prometheus."""
+    merged: dict[str, dict[tuple, list]] = {name: {} for name in HISTOGRAMS}
+    for snapshot in _snapshots.values() or [_local]:
+        for name, series in snapshot.items():
+            if name not in merged:
+                continue
+            for labels, values in series.items():
+                acc = merged[name].setdefault(labels, [0] * len(values))
+                for i, v in enumerate(values):
+                    acc[i] += v
+
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, values in sorted(merged[name].items()):
+            label_str = ",".join(f'{k}="{v}"' for k, v in zip(_LABEL_NAMES[name], labels))
+            sep = "," if label_str else ""
+            for bound, count in zip(buckets, values):
+                lines.append(f'{name}_bucket{{{label_str}{sep}le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{label_str}{sep}le="+Inf"}} {values[-1]}')
+            lines.append(f"{name}_sum{{{label_str}}} {values[-2]:.6f}")
+            lines.append(f"{name}_count{{{label_str}}} {values[-1]}")
+    return "\n".join(lines) + "\n"
@@ -2,9 +2,21 @@
 # Cliente genérico para NocoDB. Lee la configuración de config.py.
 # No necesitas modificar este archivo para añadir tablas nuevas.
 
+import copy
 import json as _json
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime
 import requests
-from config import NOCODB_URL, API_TOKEN, TABLE_CONFIG
+from cache import SharedCache, SingleFlight
+from images import variant_url
+from config import (NOCODB_URL, API_TOKEN, TABLE_CONFIG, DATA_CACHE_TTL,
+                    NOCODB_TIMEOUT, BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+from metrics import span, count_upstream
 
 HEADERS = {
     "xc-token": API_TOKEN,
@@ -12,6 +24,64 @@ HEADERS = {
 }
 
 
+# ── CIRCUITO ─────────────────────────────────────────────────────────────
+# Si NocoDB falla BREAKER_THRESHOLD veces seguidas (caído, timeout o error 5xx), las
+# peticiones siguientes fallan al instante durante BREAKER_COOLDOWN segundos en vez
+# de quedarse colgadas. Pasado ese tiempo se deja pasar una de prueba.
+
+class NocoDBUnavailable(requests.ConnectionError):
+    """NocoDB no responde y el circuito está abierto."""
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.cooldown:
+                raise NocoDBUnavailable(f"NocoDB no responde (reintento en {self.cooldown:.0f} s)")
+            self.opened_at = time.monotonic()  # una petición de prueba; el resto sigue fallando
+
+    def record(self, ok: bool):
+        with self._lock:
+            if ok:
+                self.failures, self.opened_at = 0, None
+                return
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+
+breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+
+
+def _http_get(url: str, params: dict | None = None) -> requests.Response:
+    """GET a NocoDB medido (etapa 'nocodb' y contador de llamadas del render en curso),
+    con timeout y protegido por el circuito."""
+    breaker.before_call()
+    count_upstream()
+    try:
+        with span("nocodb"):
+            r = requests.get(url, headers=HEADERS, params=params, timeout=NOCODB_TIMEOUT)
+    except (requests.ConnectionError, requests.Timeout):
+        breaker.record(ok=False)
+        raise
+    breaker.record(ok=r.status_code < 500)
+    r.raise_for_status()
+    return r
+
+
 def _get_records(table_id: str, view_id: str | None, fields: list[str] | None) -> list[dict]:
     """Obtiene todos los registros de una tabla/vista paginando automáticamente."""
     records = []
@@ -23,9 +93,7 @@ def _get_records(table_id: str, view_id: str | None, fields: list[str] | None) -
         if fields:
             all_fields = list(dict.fromkeys(["Id"] + fields))
             params["fields"] = ",".join(all_fields)
-        r = requests.get(f"{NOCODB_URL}/api/v2/tables/{table_id}/records", headers=HEADERS, params=params)
-        r.raise_for_status()
-        data = r.json()
+        data = _http_get(f"{NOCODB_URL}/api/v2/tables/{table_id}/records", params).json()
         records.extend(data["list"])
         if data["pageInfo"]["isLastPage"]:
             break
@@ -36,18 +104,22 @@ def _get_records(table_id: str, view_id: str | None, fields: list[str] | None) -
 def _get_related_records(table_id: str, link_field_id: str, row_id: int, fields: list[str] | None) -> list[dict]:
     """Obtiene los registros relacionados de un registro dado."""
     params = {"fields": ",".join(fields)} if fields else {}
-    r = requests.get(f"{NOCODB_URL}/api/v2/tables/{table_id}/links/{link_field_id}/records/{row_id}",
-                     headers=HEADERS, params=params)
-    r.raise_for_status()
+    r = _http_get(f"{NOCODB_URL}/api/v2/tables/{table_id}/links/{link_field_id}/records/{row_id}", params)
     return r.json().get("list", [])
 
 
 def _get_record(table_key: str, record_id: int) -> dict:
     """Obtiene un registro individual por Id."""
     cfg = TABLE_CONFIG[table_key]
-    r = requests.get(f"{NOCODB_URL}/api/v2/tables/{cfg['table_id']}/records/{record_id}", headers=HEADERS)
-    r.raise_for_status()
-    return r.json()
+    return _http_get(f"{NOCODB_URL}/api/v2/tables/{cfg['table_id']}/records/{record_id}").json()
+
+
+def get_attachments(table_key: str, record_id: int, field: str = "image") -> list:
+    """Adjuntos de un campo de un registro (sin descargar el resto del registro)."""
+    cfg = TABLE_CONFIG[table_key]
+    record = _http_get(f"{NOCODB_URL}/api/v2/tables/{cfg['table_id']}/records/{record_id}",
+                       {"fields": field}).json()
+    return record.get(field) or []
 
 
 def _parse_attachment_url(attachments: list) -> str | None:
@@ -59,23 +131,286 @@ def _parse_attachment_url(attachments: list) -> str | None:
     return None
 
 
-def get_table(name: str, view_id: str | None = None) -> list[dict]:
+# ── CACHÉ DE DATOS ────────────────────────────────────────────────────────
+# Los registros se guardan en la caché compartida (cache.py) por tabla y vista,
+# así todos los trabajadores del servidor reutilizan la misma descarga. Cada vista
+# tiene su propio espacio de nombres: un cambio de versión en una vista solo
+# descarta los registros de esa vista (invalidate_table descarta la tabla entera).
+
+# Descargas en curso por (tabla, clave)
+_fetches = SingleFlight()
+
+
+# Entradas de la tabla que no dependen de una vista (la lista de vistas)
+_TABLE_META = "_meta"
+
+
+def _table_cache(table_key: str, view_id: str | None) -> SharedCache:
+    return SharedCache(f"tables/{table_key}/{view_id or 'default'}", default_ttl=DATA_CACHE_TTL)
+
+
+def _version_marks(table_key: str) -> SharedCache:
+    """Última versión vista de cada vista (fuera de tables/, para que invalidar no la borre)."""
+    return SharedCache(f"versions/{table_key}")
+
+
+def invalidate_table(table_key: str):
+    """Descarta los registros cacheados de una tabla (llamar tras crear/editar/borrar)."""
+    SharedCache(f"tables/{table_key}").clear()
+    with _versions_lock:
+        for key in [k for k in _recent_versions if k[0] == table_key]:
+            del _recent_versions[key]
+
+
+def _cached(table_key: str, view_id: str | None, key: str, fetch):
+    """Devuelve fetch() reutilizando la caché compartida mientras no caduque.
+    Si otra petición ya está descargando lo mismo, espera su resultado en vez de repetirlo.
+    Caducada, se sirve la copia antigua al momento y se refresca en segundo plano."""
+    def fetch_and_store():
+        try:
+            records = fetch()
+        except requests.RequestException:
+            _failing_tables.add(table_key)
+            raise
+        _failing_tables.discard(table_key)
+        if DATA_CACHE_TTL > 0:
+            _table_cache(table_key, view_id).set(key, records)
+        return records
+
+    if DATA_CACHE_TTL > 0:
+        records, age = _table_cache(table_key, view_id).get_with_age(key, allow_expired=True)
+        if records is not None:
+            if age > DATA_CACHE_TTL:
+                _refresh_in_background(table_key, key, fetch_and_store)
+                if table_key in _failing_tables or breaker.is_open:
+                    _mark_stale(time.time() - age)
+            return records
+    records, joined = _fetches.do((table_key, key), fetch_and_store)
+    # Cada llamada recibe su propia copia, como cuando sale de la caché
+    return copy.deepcopy(records) if joined else records
+
+
+def _refresh_in_background(table_key: str, key: str, fetch_and_store):
+    def refresh():
+        try:
+            _fetches.do((table_key, key), fetch_and_store)
+        except requests.RequestException:
+            pass  # se sigue sirviendo la copia antigua, marcada como tal
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard((table_key, key))
+
+    with _refreshing_lock:
+        if (table_key, key) in _refreshing:
+            return
+        _refreshing.add((table_key, key))
+    threading.Thread(target=refresh, name=f"refresh-{table_key}", daemon=True).start()
+
+
+# ── DATOS ANTIGUOS ────────────────────────────────────────────────────────
+# Cuando NocoDB no responde y se sirven datos de la caché ya caducados, se anota
+# desde cuándo son en el contexto actual (petición o render) para avisarlo en la
+# interfaz y en los documentos.
+
+_failing_tables: set[str] = set()
+_refreshing: set[tuple[str, str]] = set()
+_refreshing_lock = threading.Lock()
+_stale_since: ContextVar[float | None] = ContextVar("stale_since", default=None)
+
+
+def _mark_stale(stored_at: float):
+    current = _stale_since.get()
+    _stale_since.set(stored_at if current is None else min(current, stored_at))
+
+
+def reset_stale():
+    """Empieza un contexto nuevo (al inicio de cada petición o render)."""
+    _stale_since.set(None)
+
+
+def stale_since() -> datetime | None:
+    """Fecha de los datos más antiguos servidos sin poder refrescar en este contexto, o None."""
+    stored_at = _stale_since.get()
+    return datetime.fromtimestamp(stored_at) if stored_at is not None else None
+
+
+# Peticiones seguidas de la misma vista (previsualización y PDF, las partes de una
+# previsualización...) reutilizan dentro de esta ventana la última respuesta en vez de
+# volver a preguntar.
+VERSION_REUSE_SECONDS = 1.0
+_recent_versions: dict[tuple, tuple[float, tuple | None]] = {}
+_versions_lock = threading.Lock()
+
+
+def get_data_version(table_key: str, view_id: str | None = None) -> tuple[str, str] | None:
+    """
+    Versión barata de los datos de una tabla/vista: una sola petición con limit=1
+    ordenada por UpdatedAt, más otra por cada tabla enlazada en sus relaciones (los
+    modificadores de los poderes también salen en los documentos). Devuelve
+    (versión, UpdatedAt más reciente) o None si no se puede determinar (NocoDB caído,
+    tabla sin campo UpdatedAt o tabla enlazada desconocida).
+    Si la versión cambia respecto a la última vista, descarta los registros cacheados
+    de esa vista (las demás se comprueban al pedir su versión).
+    """
+    cfg = TABLE_CONFIG[table_key]
+    effective_view_id = view_id or cfg.get("view_id")
+    key = (table_key, effective_view_id)
+    with _versions_lock:
+        recent = _recent_versions.get(key)
+    if recent and time.monotonic() - recent[0] < VERSION_REUSE_SECONDS:
+        return recent[1]
+    result, _ = _fetches.do((table_key, f"version:{effective_view_id}"),
+                            lambda: _fetch_data_version(table_key, cfg, effective_view_id))
+    with _versions_lock:
+        _recent_versions[key] = (time.monotonic(), result)
+    return result
+
+
+def _fetch_data_version(table_key: str, cfg: dict, effective_view_id: str | None) -> tuple[str, str] | None:
+    versions = [_fetch_table_version(cfg["table_id"], effective_view_id)]
+    for rel in cfg.get("relations", []):
+        related_id = related_table_id(table_key, rel)
+        versions.append(_fetch_table_version(related_id, None) if related_id else None)
+    if None in versions:
+        return None
+    version = "|".join(v[0] for v in versions)
+    updated_at = max(v[1] for v in versions)
+
+    marks = _version_marks(table_key)
+    if marks.get(str(effective_view_id)) != version:
+        _table_cache(table_key, effective_view_id).clear()
+        marks.set(str(effective_view_id), version)
+    return version, updated_at
+
+
+def _fetch_table_version(table_id: str, view_id: str | None) -> tuple[str, str] | None:
+    """("totalRows:UpdatedAt más reciente", UpdatedAt) de una tabla de NocoDB, o None."""
+    params = {"limit": 1, "sort": "-UpdatedAt", "fields": "Id,UpdatedAt"}
+    if view_id:
+        params["viewId"] = view_id
+    try:
+        data = _http_get(f"{NOCODB_URL}/api/v2/tables/{table_id}/records", params).json()
+    except (requests.RequestException, ValueError):
+        return None
+    rows = data.get("list") or []
+    updated_at = rows[0].get("UpdatedAt") if rows else ""
+    if updated_at is None:
+        return None
+    return f"{data.get('pageInfo', {}).get('totalRows', len(rows))}:{updated_at}", updated_at
+
+
+# table_id de la tabla enlazada por cada campo de enlace (no cambia: se pregunta una vez)
+_related_tables: dict[str, str] = {}
+
+
+def related_table_id(table_key: str, rel: dict) -> str | None:
+    """Tabla enlazada por una relación: "table_id" de la relación en config.py o, si no
+    lo tiene, la que indica NocoDB en los metadatos del campo de enlace."""
+    if rel.get("table_id"):
+        return rel["table_id"]
+    field_id = rel["link_field_id"]
+    if field_id not in _related_tables:
+        try:
+            meta = _http_get(f"{NOCODB_URL}/api/v2/meta/columns/{field_id}").json()
+        except (requests.RequestException, ValueError):
+            return None
+        related_id = (meta.get("colOptions") or {}).get("fk_related_model_id")
+        if not related_id:
+            return None
+        _related_tables[field_id] = related_id
+    return _related_tables[field_id]
+
+
+def source_tables(table_key: str) -> list[str]:
+    """Tablas cuyos registros acaban en los documentos de `table_key`: ella misma y,
+    en personajes y bestiario, las que sus fichas referencian por nombre (REFERENCES)."""
+    if table_key in REFERENCING_TABLES:
+        return [table_key, *(ref_table for ref_table, _ in REFERENCES.values())]
+    return [table_key]
+
+
+def get_sources_version(table_key: str, view_id: str | None = None) -> tuple[str, str] | None:
+    """get_data_version de la tabla (en esa vista) y de las demás de source_tables
+    (en su vista por defecto, la que usa resolve_references). None si alguna falla."""
+    versions = [get_data_version(table_key, view_id)]
+    versions += [get_data_version(other) for other in source_tables(table_key)[1:]]
+    if None in versions:
+        return None
+    return "|".join(v[0] for v in versions), max(v[1] for v in versions)
+
+
+def table_keys_for(table_id: str) -> list[str]:
+    """Tablas de TABLE_CONFIG afectadas por un cambio en `table_id`: ella misma y las que
+    la enlazan en sus relaciones."""
+    keys = [key for key, cfg in TABLE_CONFIG.items() if cfg["table_id"] == table_id]
+    for key, cfg in TABLE_CONFIG.items():
+        if key not in keys and any(related_table_id(key, rel) == table_id for rel in cfg.get("relations", [])):
+            keys.append(key)
+    return keys
+
+
+def get_table(name: str, view_id: str | None = None, fields=None) -> list[dict]:
     """
     Obtiene todos los registros de una tabla con sus relaciones resueltas.
     Si se pasa view_id, sobrescribe el view_id definido en config.py.
+    Si se pasa fields (los que usa un documento), solo se piden esos campos y las
+    relaciones incluidas en ellos.
 
     Uso:
         powers = get_table("power")
         powers = get_table("power", view_id="vwxxxxxxxx")
+        powers = get_table("power", fields={"name", "rank_name"})
         rules  = get_table("rule")
     """
     if name not in TABLE_CONFIG:
         raise ValueError(f"Tabla '{name}' no encontrada en config.py. "
                          f"Tablas disponibles: {list(TABLE_CONFIG.keys())}")
 
+    cfg, effective_view_id, key = _table_request(name, view_id, fields)
+    return _cached(name, effective_view_id, key, lambda: _fetch_table(cfg, effective_view_id))
+
+
+def get_table_views(name: str, view_ids: list[str], fields=None, workers: int = 4) -> dict[str, list[dict]]:
+    """
+    get_table() de varias vistas a la vez, en paralelo. Los registros relacionados se
+    descargan una sola vez aunque el mismo registro aparezca en varias vistas.
+    Devuelve {view_id: registros}.
+    """
+    related: dict = {}
+
+    def fetch(view_id):
+        cfg, effective_view_id, key = _table_request(name, view_id, fields)
+        return _cached(name, effective_view_id, key, lambda: _fetch_table(cfg, effective_view_id, related))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"views-{name}") as pool:
+        return dict(zip(view_ids, pool.map(fetch, view_ids)))
+
+
+def _table_request(name: str, view_id: str | None, fields) -> tuple[dict, str | None, str]:
+    """Configuración (proyectada si hay fields), vista efectiva y clave de caché de una consulta."""
     cfg = TABLE_CONFIG[name]
     effective_view_id = view_id or cfg.get("view_id")
-    records = _get_records(cfg["table_id"], effective_view_id, cfg.get("fields"))
+    key = f"table:{effective_view_id}"
+    if fields is not None:
+        cfg = _project(cfg, fields)
+        key += ":" + ",".join(cfg["fields"]) + ":" + ",".join(rel["key"] for rel in cfg["relations"])
+    return cfg, effective_view_id, key
+
+
+def _project(cfg: dict, fields) -> dict:
+    """Copia de la configuración de una tabla limitada a `fields` (+ contadores de las relaciones usadas)."""
+    relations = [rel for rel in cfg.get("relations", []) if rel["key"] in fields]
+    wanted = set(fields) - {rel["key"] for rel in cfg.get("relations", [])}
+    if cfg.get("fields") is not None:
+        wanted &= set(cfg["fields"])
+    wanted |= {rel.get("count_field", rel["key"]) for rel in relations}
+    return {**cfg, "fields": sorted(wanted) or ["Id"], "relations": relations}
+
+
+def _fetch_table(cfg: dict, view_id: str | None, related: dict | None = None) -> list[dict]:
+    """Descarga los registros de una tabla y resuelve sus relaciones.
+    related: relacionados ya descargados por (campo de enlace, Id), compartido entre vistas."""
+    records = _get_records(cfg["table_id"], view_id, cfg.get("fields"))
 
     for record in records:
         for rel in cfg.get("relations", []):
@@ -83,22 +418,165 @@ def get_table(name: str, view_id: str | None = None) -> list[dict]:
             if isinstance(count, int) and count == 0:
                 record[rel["key"]] = []
                 continue
-            record[rel["key"]] = _get_related_records(
+            fetch = lambda: _get_related_records(
                 cfg["table_id"], rel["link_field_id"], record["Id"], rel.get("fields")
             )
+            if related is None:
+                record[rel["key"]] = fetch()
+                continue
+            rel_key = (rel["link_field_id"], record["Id"])
+            if rel_key not in related:
+                related[rel_key], _ = _fetches.do(("links", cfg["table_id"], *rel_key), fetch)
+            record[rel["key"]] = related[rel_key]
 
     return records
 
 
+def get_views(table_key: str) -> list[dict]:
+    """Vistas de una tabla [{id, title}] (cacheadas como los registros)."""
+    table_id = TABLE_CONFIG[table_key]["table_id"]
+    def fetch():
+        views = _http_get(f"{NOCODB_URL}/api/v2/meta/tables/{table_id}/views").json().get("list", [])
+        return [{"id": v["id"], "title": v["title"]} for v in views]
+    return _cached(table_key, _TABLE_META, "views", fetch)
+
+
+# ── REGISTROS PEREZOSOS ───────────────────────────────────────────────────
+# Personajes y criaturas guardan su ficha completa como JSON en el campo `data`.
+# Los listados solo necesitan name/thumb_url, así que el JSON se parsea la
+# primera vez que alguien accede a `.data` y se guarda el resultado.
+# image_url y thumb_url apuntan a las miniaturas locales (images.py) si existen.
+
+_UNPARSED = object()
+
+
+def _parse_data(raw, first: bool = False):
+    """Parsea el campo `data` (JSON en string o ya decodificado).
+    first=True: si el JSON es una lista, devuelve su primer elemento."""
+    value = _json.loads(raw) if isinstance(raw, str) else raw
+    if first and isinstance(value, list):
+        value = value[0] if value else {}
+    return value
+
+
+def _is_empty_data(raw) -> bool:
+    """Comprueba si `data` está vacío sin decodificar el JSON."""
+    if isinstance(raw, str):
+        return raw.strip() in ("", "{}", "[]", "null")
+    return not raw
+
+
+class LazyRecord:
+    """
+    Registro compacto (__slots__) con `data` parseado bajo demanda.
+    Admite acceso por atributo (rec.name) y por clave (rec["name"], rec.get("name"))
+    para seguir siendo compatible con los templates y con el código que esperaba dicts.
+    """
+    __slots__ = ("id", "name", "image_url", "thumb_url", "_raw", "_data")
+    _keys = ("id", "name", "data", "image_url", "thumb_url")
+    _first = False
+
+    def __init__(self, rec: dict):
+        attachments    = rec.get("image") or []
+        original       = _parse_attachment_url(attachments)
+        self.id        = rec.get("Id")
+        self.name      = rec.get("name")
+        self.image_url = variant_url(attachments, "print") or original
+        self.thumb_url = variant_url(attachments, "list") or original
+        self._raw      = rec.get("data") or "{}"
+        self._data     = _UNPARSED
+
+    @property
+    def data(self):
+        if self._data is _UNPARSED:
+            self._data = _parse_data(self._raw, first=self._first)
+            self._raw = None
+        return self._data
+
+    @property
+    def is_empty(self) -> bool:
+        if self._data is _UNPARSED:
+            return _is_empty_data(self._raw)
+        return not self._data
+
+    def _column(self, value, key: str):
+        """Valor de una columna de NocoDB o, si no lo tiene (None), el de la ficha."""
+        if value is not None:
+            return value
+        data = self.data
+        return data.get(key) if isinstance(data, dict) else None
+
+    def __getitem__(self, key: str):
+        if key not in self._keys:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self._keys else default
+
+    def keys(self):
+        return self._keys
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self._keys}
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.id}: {self.name!r}>"
+
+
+class CharacterRecord(LazyRecord):
+    """Personaje. concept sale de la columna de NocoDB; solo si la tabla no la tiene
+    (None) se busca en `data`."""
+    __slots__ = ("_concept",)
+    _keys = ("id", "name", "concept", "data", "image_url", "thumb_url")
+
+    def __init__(self, rec: dict):
+        super().__init__(rec)
+        self._concept = rec.get("concept")
+
+    @property
+    def concept(self) -> str:
+        return self._column(self._concept, "concept") or ""
+
+
+class CreatureRecord(LazyRecord):
+    """Criatura del bestiario. type/concept/wild_card salen de las columnas de NocoDB;
+    solo si una columna no tiene valor (None) se busca en `data`. "" y False son valores."""
+    __slots__ = ("_type", "_concept", "_wild_card")
+    _keys = ("id", "name", "type", "concept", "wild_card", "data", "image_url", "thumb_url")
+    _first = True
+
+    def __init__(self, rec: dict):
+        super().__init__(rec)
+        self._type      = rec.get("type")
+        self._concept   = rec.get("concept")
+        self._wild_card = rec.get("wild_card")
+
+    @property
+    def type(self) -> str:
+        return self._column(self._type, "type") or ""
+
+    @property
+    def concept(self) -> str:
+        return self._column(self._concept, "concept") or ""
+
+    @property
+    def wild_card(self) -> bool:
+        return bool(self._column(self._wild_card, "wild_card"))
+
+
 # ── PERSONAJES ────────────────────────────────────────────────────────────
 # Necesitan funciones propias porque transforman el campo `data` (JSON en string)
 # y construyen image_url desde los adjuntos.
 
-def get_characters(view_id: str | None = None, full: bool = False) -> list[dict]:
+def get_characters(view_id: str | None = None, full: bool = False) -> list:
     """
     Devuelve lista de personajes.
     - full=False: solo Id y name (para listados y selectores)
-    - full=True: registros completos con data parseado e image_url
+    - full=True: CharacterRecord con data (parseado al primer acceso) e image_url
     """
     cfg = TABLE_CONFIG["character"]
     effective_view_id = view_id or cfg.get("view_id")
@@ -107,35 +585,31 @@ def get_characters(view_id: str | None = None, full: bool = False) -> list[dict]
         params = {"limit": 100, "fields": "Id,name"}
         if effective_view_id:
             params["viewId"] = effective_view_id
-        r = requests.get(f"{NOCODB_URL}/api/v2/tables/{cfg['table_id']}/records", headers=HEADERS, params=params)
-        r.raise_for_status()
-        return r.json().get("list", [])
+        return _http_get(f"{NOCODB_URL}/api/v2/tables/{cfg['table_id']}/records", params).json().get("list", [])
 
-    cfg = TABLE_CONFIG["character"]
-    # Forzamos los campos mínimos necesarios independientemente de la vista
-    records = _get_records(cfg["table_id"], effective_view_id, ["name", "data", "image"])
     result = []
-    for rec in records:
-        raw = rec.get("data") or "{}"
-        character = _json.loads(raw) if isinstance(raw, str) else raw
-        if not character:
+    for rec in _character_records(effective_view_id):
+        character = CharacterRecord(rec)
+        if character.is_empty:
             continue
-        result.append({
-            "id": rec.get("Id"),
-            "name": rec.get("name"),
-            "data": character,
-            "image_url": _parse_attachment_url(rec.get("image") or []),
-        })
+        result.append(character)
     return result
 
 
+def _character_records(view_id: str | None) -> list[dict]:
+    # Forzamos los campos mínimos necesarios independientemente de la vista
+    cfg = TABLE_CONFIG["character"]
+    return _cached("character", view_id, f"full:{view_id}",
+                   lambda: _get_records(cfg["table_id"], view_id, ["name", "concept", "data", "image"]))
+
+
 def get_character(record_id: int) -> dict:
-    """Devuelve un personaje completo con data parseado e image_url."""
-    record = _get_record("character", record_id)
-    raw = record.get("data") or "{}"
-    character = _json.loads(raw) if isinstance(raw, str) else raw
+    """Devuelve un personaje completo con data parseado e image_url.
+    Sale del índice si la tabla ya está en la caché; si no, se pide solo ese registro."""
+    index = warm_index("character")
+    record = (index.get(record_id) if index else None) or _get_record("character", record_id)
     return {
-        "character": character,
+        "character": _parse_data(record.get("data") or "{}"),
         "image_url": _parse_attachment_url(record.get("image") or []),
     }
 
@@ -143,11 +617,11 @@ def get_character(record_id: int) -> dict:
 # ── BESTIARIO ─────────────────────────────────────────────────────────────
 # Igual que personajes: transforman data (JSON) e image_url.
 
-def get_bestiary_entries(view_id: str | None = None, full: bool = False) -> list[dict]:
+def get_bestiary_entries(view_id: str | None = None, full: bool = False) -> list:
     """
     Devuelve lista de criaturas.
     - full=False: solo Id, name, type, concept (para listados)
-    - full=True: registros completos con data parseado e image_url
+    - full=True: CreatureRecord con data (parseado al primer acceso) e image_url
     """
     cfg = TABLE_CONFIG["bestiary"]
     effective_view_id = view_id or cfg.get("view_id")
@@ -156,42 +630,135 @@ def get_bestiary_entries(view_id: str | None = None, full: bool = False) -> list
         params = {"limit": 200, "fields": "Id,name,type,concept"}
         if effective_view_id:
             params["viewId"] = effective_view_id
-        r = requests.get(f"{NOCODB_URL}/api/v2/tables/{cfg['table_id']}/records", headers=HEADERS, params=params)
-        r.raise_for_status()
-        return r.json().get("list", [])
+        return _http_get(f"{NOCODB_URL}/api/v2/tables/{cfg['table_id']}/records", params).json().get("list", [])
 
-    result = []
-    for rec in get_table("bestiary", view_id):
-        raw = rec.get("data") or "{}"
-        creature = _json.loads(raw) if isinstance(raw, str) else raw
-        if isinstance(creature, list):
-            creature = creature[0] if creature else {}
-        wild_card = rec.get("wild_card") or creature.get("wild_card") or 0
-        result.append({
-            "id": rec.get("Id"),
-            "name": rec.get("name"),
-            "type": rec.get("type"),
-            "concept": rec.get("concept"),
-            "wild_card": bool(wild_card),
-            "data": creature,
-            "image_url": _parse_attachment_url(rec.get("image") or []),
-        })
-    return result
+    return [CreatureRecord(rec) for rec in get_table("bestiary", view_id)]
 
 
 def get_bestiary_entry(record_id: int) -> dict:
-    """Devuelve una criatura completa con data parseado e image_url."""
-    record = _get_record("bestiary", record_id)
-    raw = record.get("data") or "{}"
-    creature = _json.loads(raw) if isinstance(raw, str) else raw
-    if isinstance(creature, list):
-        creature = creature[0] if creature else {}
+    """Devuelve una criatura completa con data parseado e image_url (del índice, como get_character)."""
+    index = warm_index("bestiary")
+    record = (index.get(record_id) if index else None) or _get_record("bestiary", record_id)
     return {
-        "creature": creature,
+        "creature": _parse_data(record.get("data") or "{}", first=True),
         "image_url": _parse_attachment_url(record.get("image") or []),
     }
 
 
+# ── ÍNDICES ───────────────────────────────────────────────────────────────
+# Índices en memoria sobre las tablas cacheadas: por Id, por nombre normalizado y
+# por name_original. Se reconstruyen solo cuando cambia la entrada de la caché
+# compartida (otra descarga, un refresco o una invalidación), así que cada búsqueda
+# es un acceso a un dict.
+
+class TableIndex:
+    """Registros de una tabla con búsqueda por Id y por nombre (o name_original)."""
+    __slots__ = ("records", "by_id", "by_name")
+
+    def __init__(self, records: list):
+        self.records = records
+        self.by_id   = {rec["Id"]: rec for rec in records if rec.get("Id") is not None}
+        self.by_name = {}
+        for field in ("name_original", "name"):          # name manda si coinciden
+            for rec in records:
+                if rec.get(field):
+                    self.by_name[normalize_name(rec[field])] = rec
+
+    def get(self, record_id):
+        try:
+            return self.by_id.get(int(record_id))
+        except (TypeError, ValueError):
+            return None
+
+    def find(self, name: str):
+        """Registro por nombre. Si no hay coincidencia exacta, prueba sin los
+        añadidos entre paréntesis o corchetes: "Leal (Menor) [familia]" → "Leal"."""
+        if not name:
+            return None
+        rec = self.by_name.get(normalize_name(name))
+        if rec is None:
+            base = _QUALIFIERS.sub("", name)
+            if base != name:
+                rec = self.by_name.get(normalize_name(base))
+        return rec
+
+
+_QUALIFIERS = re.compile(r"\s*[(\[].*$")
+_indexes: dict[tuple[str, str | None], tuple[str, TableIndex]] = {}
+_indexes_lock = threading.Lock()
+
+
+def normalize_name(name: str) -> str:
+    """Minúsculas, sin tildes y con los espacios colapsados."""
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.casefold().split())
+
+
+def _index_source(table_key: str, view_id: str | None, fields) -> tuple[SharedCache, str, object]:
+    """(caché de la vista, clave en ella, función que carga los registros) de un índice."""
+    if table_key == "character":
+        view_id = view_id or TABLE_CONFIG["character"].get("view_id")
+        return _table_cache(table_key, view_id), f"full:{view_id}", lambda: _character_records(view_id)
+    _, effective_view_id, key = _table_request(table_key, view_id, fields)
+    return _table_cache(table_key, effective_view_id), key, lambda: get_table(table_key, view_id, fields)
+
+
+def get_index(table_key: str, view_id: str | None = None, fields=None) -> TableIndex:
+    """Índice de los registros de una tabla (vista por defecto si no se indica).
+    fields: como en get_table, para no descargar relaciones que no se van a usar."""
+    cache, key, load = _index_source(table_key, view_id, fields)
+    version = cache.version(key) if DATA_CACHE_TTL > 0 else ""
+    with _indexes_lock:
+        cached = _indexes.get((table_key, key))
+    if cached and version and cached[0] == version:
+        return cached[1]
+    index = TableIndex(load())
+    with _indexes_lock:
+        _indexes[(table_key, key)] = (version, index)
+    return index
+
+
+def warm_index(table_key: str, view_id: str | None = None) -> TableIndex | None:
+    """El índice solo si los registros ya están en la caché (TTL > 0); None si habría que
+    descargar la tabla entera (para buscar un solo registro sale más barato _get_record)."""
+    if DATA_CACHE_TTL <= 0:
+        return None
+    cache, key, _ = _index_source(table_key, view_id, None)
+    if not cache.version(key):
+        return None
+    return get_index(table_key, view_id)
+
+
+# Referencias por nombre dentro del JSON `data` de personajes y criaturas:
+# clave en la ficha → (tabla, campos de la entrada que se añaden)
+REFERENCING_TABLES = ("character", "bestiary")
+REFERENCES = {
+    "edges":      ("edge", None),
+    "hindrances": ("hindrance", None),
+    "powers":     ("power", {"name", "name_original", "rank_name", "cost", "range", "range_roh",
+                             "duration", "page_no", "reference_book"}),
+}
+
+
+def resolve_references(records: list) -> list:
+    """Añade a la ficha (`data`) de cada personaje o criatura las entradas completas de
+    sus ventajas, desventajas y poderes: data["edge_refs"], ["hindrance_refs"],
+    ["power_refs"], listas de {"label": texto de la ficha, "entry": registro o None}."""
+    indexes = {key: get_index(table_key, fields=fields) for key, (table_key, fields) in REFERENCES.items()}
+    for record in records:
+        data = record.data
+        if not isinstance(data, dict):
+            continue
+        for key, index in indexes.items():
+            refs = []
+            for item in data.get(key) or []:
+                label = item.get("name", "") if isinstance(item, dict) else str(item)
+                refs.append({"label": label, "entry": index.find(label)})
+            data[f"{REFERENCES[key][0]}_refs"] = refs
+    return records
+
+
 if __name__ == "__main__":
     import sys
     table = sys.argv[1] if len(sys.argv) > 1 else "power"
@@ -0,0 +1,37 @@
+# profiling.py
+# Perfilado bajo demanda de un render concreto (cProfile).
+# Solo se usa si se pide explícitamente (?profile=1 o --profile): sin petición, no hay coste.
+#
+# El .prof se puede explorar como gráfico de llamas con snakeviz:
+#     pip install snakeviz && snakeviz power_manual_print.pdf.prof
+
+import cProfile
+import io
+import pstats
+from pathlib import Path
+
+REPORT_LINES = 40
+
+
+def run_profiled(func, *args, **kwargs):
+    """Ejecuta func(*args, **kwargs) bajo cProfile. Devuelve (resultado, profiler)."""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    return result, profiler
+
+
+def report(profiler: cProfile.Profile, sort: str = "cumulative", lines: int = REPORT_LINES) -> str:
+    """Resumen en texto de las funciones más costosas."""
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).strip_dirs().sort_stats(sort).print_stats(lines)
+    return stream.getvalue()
+
+
+def save_profile(profiler: cProfile.Profile, path: Path) -> str:
+    """Guarda <path>.prof (pstats) y <path>.txt (resumen). Devuelve el resumen."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(path.with_name(path.name + ".prof")))
+    text = report(profiler)
+    path.with_name(path.name + ".txt").write_text(text, encoding="utf-8")
+    return text
@@ -0,0 +1,187 @@
+# template_fields.py
+# Qué campos de los registros usa realmente un template de documento.
+#
+# Se analiza el AST de Jinja2 (una vez por versión del archivo) siguiendo la variable
+# de datos del documento (data_key): bucles `for x in data_key`, `set` con filtros
+# que conservan los registros (sort, selectattr, list...), groupby, y los accesos
+# x.campo / x['campo'] / x.get('campo') / filtros con attribute='campo'.
+#
+# Si el template usa los registros de una forma que no se puede seguir (pasarlos a
+# una macro, volcarlos con tojson...), devuelve None: hay que pedir todos los campos.
+
+from jinja2 import nodes
+
+from cache import file_version
+
+# Filtros que devuelven los mismos registros (filtrados, ordenados...)
+LIST_FILTERS   = {"sort", "selectattr", "rejectattr", "reverse", "list", "unique", "select", "reject", "batch", "slice"}
+# Filtros que devuelven un registro
+RECORD_FILTERS = {"first", "last", "random"}
+# Filtros que devuelven valores (no registros): solo importa el attribute=
+VALUE_FILTERS  = {"map", "sum", "length", "count", "min", "max"}
+
+_LIST, _RECORD, _GROUPS, _GROUP = "list", "record", "groups", "group"
+
+_analysis: dict[tuple[str, str], tuple[str, frozenset | None]] = {}
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def used_fields(env, template_name: str, data_key: str) -> frozenset[str] | None:
+    """Campos de los registros de `data_key` que usa el template (y los que extiende o incluye)."""
+    versions, asts = [], []
+    try:
+        _collect_templates(env, template_name, versions, asts, seen=set())
+    except _Unsupported:
+        return None
+    version = "|".join(versions)
+    cached = _analysis.get((template_name, data_key))
+    if cached and cached[0] == version:
+        return cached[1]
+    try:
+        fields = frozenset().union(*(_fields_in(ast, data_key) for ast in asts))
+    except _Unsupported:
+        fields = None
+    _analysis[(template_name, data_key)] = (version, fields)
+    return fields
+
+
+def _collect_templates(env, name: str, versions: list, asts: list, seen: set):
+    """AST del template y de los que extiende / incluye / importa (nombres constantes)."""
+    if name in seen:
+        return
+    seen.add(name)
+    source, filename, _ = env.loader.get_source(env, name)
+    versions.append(f"{name}:{file_version(filename)}")
+    ast = env.parse(source)
+    asts.append(ast)
+    for node in ast.find_all((nodes.Extends, nodes.Include, nodes.Import, nodes.FromImport)):
+        if not isinstance(node.template, nodes.Const):
+            raise _Unsupported(name)
+        _collect_templates(env, node.template.value, versions, asts, seen)
+
+
+def _parents(ast) -> dict[int, nodes.Node]:
+    parents = {}
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        for child in node.iter_child_nodes():
+            parents[id(child)] = node
+            stack.append(child)
+    return parents
+
+
+def _attribute_args(node: nodes.Filter) -> set[str]:
+    """attribute='x' o primer argumento (selectattr/groupby...) de un filtro; 'a.b' → 'a'."""
+    values = [kw.value for kw in node.kwargs if kw.key == "attribute"]
+    if node.name in ("selectattr", "rejectattr", "groupby") and node.args:
+        values.append(node.args[0])
+    found = set()
+    for value in values:
+        if not isinstance(value, nodes.Const) or not isinstance(value.value, str):
+            raise _Unsupported(node.name)
+        found.add(value.value.split(".")[0])
+    return found
+
+
+def _fields_in(ast, data_key: str) -> set[str]:
+    parents = _parents(ast)
+    names = {data_key: _LIST}
+    fields: set[str] = set()
+
+    def kind_of(node) -> str | None:
+        if isinstance(node, nodes.Name):
+            return names.get(node.name)
+        if isinstance(node, nodes.Filter) and node.node is not None:
+            base = kind_of(node.node)
+            if base == _LIST:
+                if node.name in LIST_FILTERS:
+                    return _LIST
+                if node.name in RECORD_FILTERS:
+                    return _RECORD
+                if node.name == "groupby":
+                    return _GROUPS
+            return None
+        if isinstance(node, nodes.Getattr) and node.attr == "list" and kind_of(node.node) == _GROUP:
+            return _LIST
+        if isinstance(node, nodes.Getitem) and kind_of(node.node) == _LIST:
+            return _LIST if isinstance(node.arg, nodes.Slice) else _RECORD   # items[a:b] / items[i]
+        return None
+
+    def bind(target, kind: str):
+        if isinstance(target, nodes.Name):
+            if names.get(target.name, kind) != kind:
+                raise _Unsupported(target.name)
+            changed = target.name not in names
+            names[target.name] = kind
+            return changed
+        if kind == _GROUP and isinstance(target, nodes.Tuple) and len(target.items) == 2:
+            # {% for grouper, items in data|groupby('x') %}
+            if not all(isinstance(item, nodes.Name) for item in target.items):
+                raise _Unsupported("groupby")
+            return bind(target.items[1], _LIST)
+        raise _Unsupported("target")
+
+    def check_use(node):
+        """Sube desde un uso de un nombre seguido hasta la expresión completa y la valida."""
+        while True:
+            parent = parents.get(id(node))
+            kind = kind_of(node)
+            if isinstance(parent, nodes.Filter) and parent.node is node:
+                if kind == _LIST:
+                    fields.update(_attribute_args(parent))
+                    if kind_of(parent) is not None:
+                        node = parent
+                        continue
+                    if parent.name in VALUE_FILTERS:
+                        return False
+                raise _Unsupported(parent.name)
+            if isinstance(parent, nodes.Getattr) and parent.node is node:
+                if kind == _RECORD:
+                    if parent.attr == "get":
+                        call = parents.get(id(parent))
+                        if (isinstance(call, nodes.Call) and call.node is parent and call.args
+                                and isinstance(call.args[0], nodes.Const)):
+                            fields.add(call.args[0].value)
+                            return False
+                        raise _Unsupported("get")
+                    fields.add(parent.attr)
+                    return False
+                if kind == _GROUP and parent.attr in ("grouper", "list"):
+                    if parent.attr == "list":
+                        node = parent
+                        continue
+                    return False
+                raise _Unsupported(parent.attr)
+            if isinstance(parent, nodes.Getitem) and parent.node is node and kind == _LIST:
+                node = parent
+                continue
+            if isinstance(parent, nodes.Getitem) and parent.node is node and kind == _RECORD:
+                if isinstance(parent.arg, nodes.Const) and isinstance(parent.arg.value, str):
+                    fields.add(parent.arg.value)
+                    return False
+                raise _Unsupported("getitem")
+            if isinstance(parent, nodes.For) and parent.iter is node and kind in (_LIST, _GROUPS):
+                return bind(parent.target, _RECORD if kind == _LIST else _GROUP)
+            if isinstance(parent, nodes.Assign) and parent.node is node and kind in (_LIST, _RECORD):
+                return bind(parent.target, kind)
+            if isinstance(parent, (nodes.And, nodes.Or)):
+                node = parent
+                continue
+            if (isinstance(parent, (nodes.If, nodes.CondExpr)) and parent.test is node
+                    or isinstance(parent, (nodes.Not, nodes.Test))):
+                return False  # solo se comprueba si hay datos
+            raise _Unsupported(type(parent).__name__)
+
+    # Cada for/set nuevo sobre los datos añade nombres a seguir: repetir hasta que no cambie
+    changed = True
+    while changed:
+        changed = False
+        fields.clear()
+        for name in ast.find_all(nodes.Name):
+            if name.ctx == "load" and name.name in names:
+                changed |= bool(check_use(name))
+    return fields
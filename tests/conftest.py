@@ -0,0 +1,92 @@
+# tests/conftest.py
+# Los tests usan el NocoDB falso de los benchmarks (benchmarks/fake_nocodb.py) con
+# datos sintéticos. config.py lee el entorno al importarse, así que el servidor falso
+# se arranca y el entorno se prepara aquí, antes de importar la aplicación.
+#
+# Ejecutar (desde la raíz del proyecto):
+#   python -m pytest -q
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_render import setup_environment
+from benchmarks.fake_nocodb import FakeNocoDB
+from benchmarks.synthetic import Dataset, build_dataset
+
+ROWS              = 12             # registros por tabla
+CACHE_TTL         = 300            # con caché de datos: los tests cuentan peticiones a NocoDB
+PREVIEW_PAGE_SIZE = 5
+WEBHOOK_SECRET    = "secreto-de-prueba"
+
+_fake = FakeNocoDB(Dataset()).start()
+_cache_dir = tempfile.mkdtemp(prefix="savagepy-tests-")
+setup_environment(_fake, _cache_dir, CACHE_TTL)
+os.environ["SAVAGEPY_PREVIEW_PAGE_SIZE"] = str(PREVIEW_PAGE_SIZE)
+os.environ["SAVAGEPY_WEBHOOK_SECRET"]    = WEBHOOK_SECRET
+os.environ["SAVAGEPY_WEBHOOK_PRERENDER"] = "0"
+
+from config import TABLE_CONFIG          # noqa: E402  (después de preparar el entorno)
+import bestiary_stats                    # noqa: E402
+import nocodb_client                     # noqa: E402
+from app import app                      # noqa: E402
+
+_CARD_NAME = re.compile(r'class="card-name">([^<]+)<')
+
+
+def card_names(html: str) -> list[str]:
+    """Nombres de las cartas de un HTML de cartas de poder, en orden."""
+    return _CARD_NAME.findall(html)
+
+
+def forget_recent_versions():
+    """Como si hubiera pasado VERSION_REUSE_SECONDS: la próxima petición vuelve a preguntar la versión."""
+    with nocodb_client._versions_lock:
+        nocodb_client._recent_versions.clear()
+
+
+def touch(row: dict, stamp: str = "2030-01-01 00:00:00+00:00"):
+    """Marca un registro del NocoDB falso como editado."""
+    row["UpdatedAt"] = stamp
+    forget_recent_versions()
+
+
+def clear_caches():
+    """Vacía las cachés de datos y documentos (disco y memoria) sin tocar los datos."""
+    shutil.rmtree(_cache_dir, ignore_errors=True)
+    forget_recent_versions()
+    nocodb_client._indexes.clear()
+    nocodb_client._failing_tables.clear()
+    bestiary_stats._rows.clear()
+    bestiary_stats._tables.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clean_state():
+    """Cada test empieza con datos nuevos y sin cachés."""
+    _fake.dataset = build_dataset(ROWS, TABLE_CONFIG)
+    clear_caches()
+    yield
+
+
+@pytest.fixture
+def fake() -> FakeNocoDB:
+    return _fake
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.fixture
+def table_rows(fake):
+    """table_rows("power") → registros de esa tabla en el NocoDB falso (modificables)."""
+    return lambda table_key: fake.dataset.tables[TABLE_CONFIG[table_key]["table_id"]]
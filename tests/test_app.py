@@ -0,0 +1,111 @@
+# tests/test_app.py
+# Rutas de la interfaz: ETag/304, previsualización por partes y webhook de NocoDB.
+
+import generate
+import nocodb_client
+from config import TABLE_CONFIG
+
+from conftest import PREVIEW_PAGE_SIZE, ROWS, WEBHOOK_SECRET, card_names, touch
+
+DOC = "power.cards_mobile"
+
+
+# ── ETAG / 304 ─────────────────────────────────────────────────────────────
+
+def test_unchanged_document_answers_304(client):
+    first = client.get(f"/download/{DOC}/html")
+    assert first.status_code == 200 and first.headers["ETag"]
+    again = client.get(f"/download/{DOC}/html", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and not again.data
+    assert again.headers["ETag"] == first.headers["ETag"]
+    since = client.get(f"/download/{DOC}/html", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert since.status_code == 304
+
+
+def test_edited_record_changes_the_etag(client, table_rows):
+    etag = client.get(f"/download/{DOC}/html").headers["ETag"]
+    touch(table_rows("power")[0])
+    response = client.get(f"/download/{DOC}/html", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+
+
+def test_etag_depends_on_the_view(client):
+    view_id = nocodb_client.get_views("power")[0]["id"]
+    etag = client.get(f"/download/{DOC}/html").headers["ETag"]
+    other = client.get(f"/download/{DOC}/html?view_id={view_id}", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+
+
+def test_data_version_is_checked_once_per_request(client, monkeypatch):
+    calls = []
+    original = generate.get_sources_version
+    monkeypatch.setattr(generate, "get_sources_version", lambda *a: calls.append(a) or original(*a))
+    for path in (f"/download/{DOC}/html", f"/preview/{DOC}"):
+        calls.clear()
+        assert client.get(path).status_code == 200
+        assert calls == [("power", None)]
+
+
+# ── PREVISUALIZACIÓN POR PARTES ────────────────────────────────────────────
+
+def test_lazy_preview_sends_the_first_records_then_slices(client):
+    full = card_names(client.get(f"/download/{DOC}/html").get_data(as_text=True))
+    assert len(full) == ROWS
+
+    preview = client.get(f"/preview/{DOC}").get_data(as_text=True)
+    assert card_names(preview) == full[:PREVIEW_PAGE_SIZE]
+    assert f'data-total="{ROWS}"' in preview
+
+    chunk = client.get(f"/preview/{DOC}/slice?offset={PREVIEW_PAGE_SIZE}&limit={PREVIEW_PAGE_SIZE}")
+    assert chunk.status_code == 200
+    assert card_names(chunk.get_data(as_text=True)) == full[PREVIEW_PAGE_SIZE:2 * PREVIEW_PAGE_SIZE]
+    assert "<body" not in chunk.get_data(as_text=True)
+
+
+def test_slice_rejects_bad_ranges(client):
+    assert client.get(f"/preview/{DOC}/slice?offset=-1&limit=5").status_code == 400
+    assert client.get(f"/preview/{DOC}/slice?offset=0&limit=0").status_code == 400
+    assert client.get("/preview/power.no_existe/slice?offset=0&limit=5").status_code == 404
+
+
+# ── WEBHOOK ────────────────────────────────────────────────────────────────
+
+def _webhook(client, table_id: str, secret: str = WEBHOOK_SECRET):
+    return client.post("/api/webhooks/nocodb", json={"type": "records.after.update", "data": {"table_id": table_id}},
+                       headers={"X-Webhook-Secret": secret})
+
+
+def test_webhook_requires_the_secret(client):
+    assert _webhook(client, TABLE_CONFIG["power"]["table_id"], secret="otro").status_code == 403
+    in_url = client.post(f"/api/webhooks/nocodb?secret={WEBHOOK_SECRET}",
+                         json={"data": {"table_id": TABLE_CONFIG["power"]["table_id"]}})
+    assert in_url.status_code == 403
+
+
+def test_webhook_invalidates_the_table_and_its_documents(fake, client):
+    etag = client.get(f"/download/{DOC}/html").headers["ETag"]
+    response = _webhook(client, TABLE_CONFIG["power"]["table_id"])
+    assert response.status_code == 200
+    assert response.json["tables"] == ["power"] and DOC in response.json["documents"]
+
+    before = fake.requests
+    again = client.get(f"/download/{DOC}/html", headers={"If-None-Match": etag})
+    assert again.status_code == 304                           # mismos datos: sigue valiendo
+    client.get(f"/download/{DOC}/html")
+    assert fake.requests - before > 1 + len(TABLE_CONFIG["power"]["relations"])   # se volvió a descargar
+
+
+def test_webhook_for_a_linked_table_reaches_its_parents(client):
+    rel = TABLE_CONFIG["power"]["relations"][0]
+    response = _webhook(client, nocodb_client.related_table_id("power", rel))
+    assert "power" in response.json["tables"] and DOC in response.json["documents"]
+
+
+def test_webhook_for_a_referenced_table_reaches_the_sheets(client):
+    response = _webhook(client, TABLE_CONFIG["edge"]["table_id"])
+    assert response.json["tables"] == ["edge"]
+    assert any(doc_id.startswith("character.") for doc_id in response.json["documents"])
+
+
+def test_webhook_ignores_unknown_tables(client):
+    assert _webhook(client, "tabla-desconocida").json["table"] is None
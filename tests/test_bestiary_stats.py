@@ -0,0 +1,85 @@
+# tests/test_bestiary_stats.py
+# Estadísticas del bestiario (NumPy es opcional: sin él estos tests se saltan).
+
+import json
+
+import pytest
+
+import bestiary_stats
+from bestiary_stats import ATTRIBUTES, DERIVED, die_value, stat_row
+from nocodb_client import invalidate_table
+
+from conftest import ROWS
+
+np = pytest.importorskip("numpy")
+
+
+def _derived(data: dict) -> dict:
+    return dict(zip(DERIVED, stat_row(data)[len(ATTRIBUTES):]))
+
+
+def test_die_value():
+    assert die_value("d8") == 8
+    assert die_value("d12+2") == 14
+    assert die_value("d6-1") == 5
+    assert die_value("") is None and die_value("3") is None
+
+
+def test_stat_row_treats_form_zeros_as_missing():
+    stats = _derived({"pace": 0, "parry": 0, "toughness": 0, "power_points": 0, "size": 0, "wounds": 3})
+    assert stats["pace"] is None and stats["parry"] is None and stats["toughness"] is None
+    assert stats["power_points"] is None and stats["armor"] is None
+    assert stats["size"] == 0 and stats["wounds"] == 3
+
+
+def test_summary_endpoint(client):
+    response = client.get("/api/bestiary/stats?group=wild_card&stats=parry,toughness")
+    assert response.status_code == 200
+    summary = response.json
+    assert summary["creatures"] == ROWS and summary["stats"] == ["parry", "toughness"]
+    assert sum(group["creatures"] for group in summary["groups"]) == ROWS
+    bands = summary["all"]["bands"]["toughness"]
+    assert summary["all"]["min"]["toughness"] <= bands["p50"] <= summary["all"]["max"]["toughness"]
+    assert client.get("/api/bestiary/stats?stats=no_existe").status_code == 400
+
+
+def test_comparable_endpoint(client):
+    response = client.get("/api/bestiary/1/comparable?limit=3&stats=parry,toughness")
+    assert response.status_code == 200
+    result = response.json
+    assert result["creature"]["id"] == 1
+    distances = [c["distance"] for c in result["comparable"]]
+    assert len(distances) == 3 and distances == sorted(distances)
+    assert 1 not in [c["id"] for c in result["comparable"]]
+    assert client.get("/api/bestiary/9999/comparable").status_code == 404
+
+
+def test_saving_a_creature_only_reparses_that_one(table_rows, monkeypatch):
+    bestiary_stats.get_stat_table()
+    row = table_rows("bestiary")[0]
+    data = json.loads(row["data"])
+    data["parry"] = 99
+    row["data"] = json.dumps(data)
+    invalidate_table("bestiary")                              # como al guardar desde la interfaz
+
+    parsed = []
+    original = bestiary_stats._parse_data
+    monkeypatch.setattr(bestiary_stats, "_parse_data", lambda *a, **k: parsed.append(1) or original(*a, **k))
+    table = bestiary_stats.get_stat_table()
+    assert len(parsed) == 1
+    assert table.values[table.position(row["Id"]), bestiary_stats.STATS.index("parry")] == 99
+
+
+def test_toughness_variant_is_the_armor_bonus():
+    assert _derived({"toughness": 5, "toughness_variant": {"value": 6}})["armor"] == 6
+    assert _derived({"toughness": 8, "toughness_variant": {"value": 2}})["armor"] == 2
+    assert _derived({"armor": 3, "toughness_variant": {"value": 6}})["armor"] == 3
+
+
+def test_deleted_creatures_leave_the_row_cache(table_rows):
+    bestiary_stats.get_stat_table()
+    deleted = table_rows("bestiary").pop()
+    invalidate_table("bestiary")
+    table = bestiary_stats.get_stat_table()
+    assert table.position(deleted["Id"]) is None
+    assert deleted["Id"] not in bestiary_stats._rows and len(bestiary_stats._rows) == ROWS - 1
@@ -0,0 +1,104 @@
+# tests/test_cache.py
+# SharedCache (disco, compartida entre procesos) y SingleFlight (agrupa llamadas simultáneas).
+
+import threading
+import time
+
+import pytest
+
+from cache import SharedCache, SingleFlight, content_hash
+
+
+# ── SharedCache ────────────────────────────────────────────────────────────
+
+def test_shared_cache_round_trip():
+    cache = SharedCache("tests/round-trip")
+    assert cache.get("clave") is None
+    cache.set("clave", {"a": [1, 2]})
+    assert cache.get("clave") == {"a": [1, 2]}
+    assert SharedCache("tests/round-trip").get("clave") == {"a": [1, 2]}   # otra instancia, mismo disco
+
+
+def test_shared_cache_expired_entries():
+    cache = SharedCache("tests/expired", default_ttl=60)
+    cache.set("viejo", "valor", ttl=-1)
+    assert cache.get("viejo") is None
+    value, age = cache.get_with_age("viejo", allow_expired=True)
+    assert value == "valor" and age >= 0
+    cache.set("nuevo", "valor")
+    assert cache.get("nuevo") == "valor"
+
+
+def test_shared_cache_version_delete_and_clear():
+    cache = SharedCache("tests/version")
+    assert cache.version("clave") == ""
+    cache.set("clave", 1)
+    first = cache.version("clave")
+    time.sleep(0.01)
+    cache.set("clave", 2)
+    assert cache.version("clave") not in ("", first)
+    cache.delete("clave")
+    assert cache.get("clave") is None
+    cache.set("otra", 1)
+    cache.clear()
+    assert cache.get("otra") is None and cache.values() == []
+
+
+def test_content_hash_is_stable():
+    assert content_hash({"b": 1, "a": 2}) == content_hash({"a": 2, "b": 1})
+    assert content_hash([1, 2]) != content_hash([2, 1])
+
+
+# ── SingleFlight ───────────────────────────────────────────────────────────
+
+def _concurrent(flight: SingleFlight, fn, callers: int = 5) -> list:
+    """Lanza `callers` llamadas a flight.do con la misma clave mientras fn está en curso."""
+    results, started = [], threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return fn()
+
+    def call():
+        try:
+            results.append(flight.do("clave", slow))
+        except Exception as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.1)                           # los demás ya esperan al primero
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_single_flight_runs_once_for_concurrent_callers():
+    flight, calls = SingleFlight(), []
+    results = _concurrent(flight, lambda: calls.append(1) or "resultado")
+    assert len(calls) == 1
+    assert sorted(joined for _, joined in results) == [False, True, True, True, True]
+    assert all(result == "resultado" for result, _ in results)
+    assert flight.in_flight() == 0
+
+
+def test_single_flight_shares_the_error():
+    def fail():
+        raise RuntimeError("NocoDB caído")
+    results = _concurrent(SingleFlight(), fail, callers=3)
+    assert len(results) == 3 and all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_single_flight_sequential_calls_run_again():
+    flight, calls = SingleFlight(), []
+    for _ in range(2):
+        flight.do("clave", lambda: calls.append(1))
+    assert len(calls) == 2
+    with pytest.raises(ValueError):
+        flight.do("clave", lambda: int("x"))
@@ -0,0 +1,55 @@
+# tests/test_export_views.py
+# Exportación de todas las vistas públicas (ZIP): la descarga previa de los datos de
+# todas las vistas tiene que ahorrar peticiones a NocoDB, no repetirlas.
+
+import zipfile
+from io import BytesIO
+
+import pytest
+
+import generate
+from config import TABLE_CONFIG
+
+from conftest import clear_caches
+
+DOC = "power.cards_mobile"
+
+
+@pytest.fixture(autouse=True)
+def _layout_free_pdf(monkeypatch):
+    """Sin maquetar: el PDF de cada vista solo pide sus datos, como el de verdad."""
+    def write_pdf(doc_id, view_id, target):
+        doc, table_key = generate.find_doc(doc_id)
+        records = generate.get_data(table_key, view_id, generate.document_fields(doc))
+        target.write(f"%PDF {len(records)}".encode())
+    monkeypatch.setattr(generate, "_write_pdf", write_pdf)
+
+
+def _export_requests(fake, client) -> int:
+    clear_caches()
+    before = fake.requests
+    response = client.get(f"/download/{DOC}/views/zip")
+    assert response.status_code == 200
+    assert len(zipfile.ZipFile(BytesIO(response.data)).namelist()) == len(generate.public_views("power"))
+    return fake.requests - before
+
+
+def _views_overlap(fake):
+    """Todas las vistas públicas muestran todos los registros."""
+    ids = {row["Id"] for row in fake.dataset.tables[TABLE_CONFIG["power"]["table_id"]]}
+    for view in generate.public_views("power"):
+        fake.dataset.view_rows[view["id"]] = ids
+
+
+def test_prefetch_saves_requests_when_views_share_records(fake, client, monkeypatch):
+    _views_overlap(fake)
+    with_prefetch = _export_requests(fake, client)
+    monkeypatch.setattr(generate, "_prefetch_views", lambda *args: None)
+    without_prefetch = _export_requests(fake, client)
+    assert with_prefetch < without_prefetch
+
+
+def test_prefetch_never_costs_extra_requests(fake, client, monkeypatch):
+    with_prefetch = _export_requests(fake, client)
+    monkeypatch.setattr(generate, "_prefetch_views", lambda *args: None)
+    assert with_prefetch <= _export_requests(fake, client)
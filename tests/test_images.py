@@ -0,0 +1,46 @@
+# tests/test_images.py
+# Límites de las imágenes subidas: se rechazan antes de que Pillow las descomprima.
+
+import io
+
+import pytest
+
+import images
+from app import app
+
+PIL = pytest.importorskip("PIL")
+
+
+def _png(width: int, height: int) -> io.BytesIO:
+    from PIL import Image
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), "white").save(out, "PNG")
+    out.seek(0)
+    return out
+
+
+@pytest.fixture(autouse=True)
+def _images_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "IMAGES_DIR", tmp_path)
+
+
+def test_ingest_normalizes_an_image():
+    image = images.ingest(_png(40, 30), "retrato.png", "image/png")
+    assert image.content and image.filename.startswith(image.digest)
+
+
+def test_ingest_rejects_oversized_files(monkeypatch):
+    upload = _png(40, 30)
+    monkeypatch.setattr(images, "MAX_BYTES", len(upload.getvalue()) - 1)
+    with pytest.raises(ValueError, match="ocupa más de"):
+        images.ingest(upload, "retrato.png", "image/png")
+
+
+def test_ingest_rejects_images_with_too_many_pixels(monkeypatch):
+    monkeypatch.setattr(images, "MAX_PIXELS", 40 * 30 - 1)
+    with pytest.raises(ValueError, match="demasiado grande"):
+        images.ingest(_png(40, 30), "retrato.png", "image/png")
+
+
+def test_requests_are_bounded():
+    assert app.config["MAX_CONTENT_LENGTH"] == images.MAX_BYTES + images.FORM_MARGIN
@@ -0,0 +1,108 @@
+# tests/test_nocodb_client.py
+# Versiones de datos por vista, peticiones a NocoDB por render, referencias por nombre
+# y proyección de campos, contra el NocoDB falso.
+
+import json
+
+from jinja2 import Environment, FileSystemLoader
+
+import nocodb_client
+from config import TABLE_CONFIG
+from generate import public_views
+from nocodb_client import get_characters, get_sources_version, get_table, resolve_references
+from template_fields import used_fields
+
+from conftest import forget_recent_versions, touch
+
+DOC = "power.cards_mobile"
+
+
+def _version_requests(table_key: str) -> int:
+    """Peticiones limit=1 de get_data_version: la tabla y cada tabla enlazada."""
+    return 1 + len(TABLE_CONFIG[table_key].get("relations", []))
+
+
+def _render_requests(fake, client, view_id: str | None) -> int:
+    forget_recent_versions()
+    before = fake.requests
+    response = client.get(f"/download/{DOC}/html" + (f"?view_id={view_id}" if view_id else ""))
+    assert response.status_code == 200
+    return fake.requests - before
+
+
+# ── PETICIONES POR RENDER ──────────────────────────────────────────────────
+
+def test_warm_render_only_checks_the_version(fake, client):
+    """Con los datos en caché, cada render cuesta solo las consultas de versión, también
+    alternando vistas de la misma tabla (una vista no invalida las demás)."""
+    views = [v["id"] for v in public_views("power")][:2]
+    for view_id in views:                                     # primera vez: descarga
+        _render_requests(fake, client, view_id)
+    warm = [_render_requests(fake, client, view_id) for view_id in views * 2]
+    assert warm == [_version_requests("power")] * 4
+
+
+def test_version_change_only_refetches_that_view(fake, client, table_rows):
+    views = [v["id"] for v in public_views("power")][:2]
+    for view_id in views:
+        _render_requests(fake, client, view_id)
+    edited = next(row for row in table_rows("power") if row["Id"] in fake.dataset.view_rows[views[0]])
+    touch(edited)
+    assert _render_requests(fake, client, views[0]) > _version_requests("power")
+    assert _render_requests(fake, client, views[1]) == _version_requests("power")
+
+
+def test_linked_table_changes_the_version(table_rows, fake):
+    before = get_sources_version("power")
+    rel = TABLE_CONFIG["power"]["relations"][0]
+    linked = fake.dataset.tables[nocodb_client.related_table_id("power", rel)]
+    touch(linked[0])
+    assert get_sources_version("power") != before
+
+
+def test_referenced_tables_change_the_sheet_version(table_rows):
+    before = get_sources_version("character")
+    touch(table_rows("edge")[0])
+    assert get_sources_version("character") != before
+
+
+# ── REFERENCIAS POR NOMBRE ─────────────────────────────────────────────────
+
+def test_resolve_references_by_normalized_name(table_rows):
+    row = table_rows("character")[0]
+    data = json.loads(row["data"])
+    data["edges"] = ["edge 3 (Menor)", "No existe"]
+    data["powers"] = [{"name": "PODER inventado"}, {"name": "Power 2"}]
+    row["data"] = json.dumps(data)
+
+    character = next(c for c in get_characters(full=True) if c["name"] == row["name"])
+    resolve_references([character])
+    edges = character.data["edge_refs"]
+    assert [ref["label"] for ref in edges] == ["edge 3 (Menor)", "No existe"]
+    assert edges[0]["entry"]["name"] == "Edge 3" and edges[1]["entry"] is None
+    powers = character.data["power_refs"]
+    assert powers[0]["entry"] is None and powers[1]["entry"]["name"] == "Power 2"
+
+
+# ── PROYECCIÓN DE CAMPOS ───────────────────────────────────────────────────
+
+def _env(tmp_path, source: str) -> Environment:
+    (tmp_path / "doc.html").write_text(source, encoding="utf-8")
+    return Environment(loader=FileSystemLoader(tmp_path))
+
+
+def test_used_fields_follows_loops_and_filters(tmp_path):
+    env = _env(tmp_path, "{% for p in powers|sort(attribute='rank_name') %}{{ p.name }} {{ p['cost'] }}"
+               "{{ p.get('range') }}{% endfor %}{{ powers|map(attribute='page_no')|sum }}")
+    assert used_fields(env, "doc.html", "powers") == {"name", "cost", "range", "rank_name", "page_no"}
+
+
+def test_used_fields_gives_up_on_untraceable_use(tmp_path):
+    assert used_fields(_env(tmp_path, "{{ powers|tojson }}"), "doc.html", "powers") is None
+
+
+def test_get_table_requests_only_the_projected_fields():
+    records = get_table("power", fields={"name", "rank_name"})
+    assert records and all(set(rec) <= {"Id", "name", "rank_name"} for rec in records)
+    full = get_table("power")
+    assert "description" in full[0]
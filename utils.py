@@ -2,51 +2,96 @@
 # Diagnóstico de entorno y preparación de recursos. Llamar al inicio de app.py.
 
 import importlib
-import re
+import importlib.metadata
+import json
+import os
+import shutil
 import subprocess
 import sys
+import threading
 from pathlib import Path
 
-FONTS_CACHE_DIR = Path(__file__).parent / "static" / "fonts" / "cache"
-FONTS_HEADERS   = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/120 Safari/537.36"}
-
-# Todas las fuentes que usa el proyecto (UI + templates de documentos).
-# Si un template nuevo usa fuentes distintas, añadir la URL aquí.
-REQUIRED_FONTS = [
-    # UI (base.html) + character_sheet, bestiary_mobile, edge_cards...
-    "https://fonts.googleapis.com/css2?family=Cinzel:wght@400;600;700&family=EB+Garamond:ital,wght@0,400;0,500;1,400&family=Rajdhani:wght@400;500;600;700&display=swap",
-    # Variante con Rajdhani 500;600;700 (power_cards, rules_manual...)
-    "https://fonts.googleapis.com/css2?family=Cinzel:wght@400;600;700&family=EB+Garamond:ital,wght@0,400;0,500;1,400&family=Rajdhani:wght@500;600;700&display=swap",
-    # Variante con Cinzel 900 y EB Garamond 600 (treasure_cards, equipment_cards...)
-    "https://fonts.googleapis.com/css2?family=Cinzel:wght@400;600;700;900&family=EB+Garamond:ital,wght@0,400;0,500;0,600;1,400&family=Rajdhani:wght@500;600;700&display=swap",
-    # Variante con Crimson Pro (powers_manual, edges_manual...)
-    "https://fonts.googleapis.com/css2?family=Cinzel:wght@400;600;700&family=Crimson+Pro:ital,wght@0,400;0,600;1,400&display=swap",
-    # Variante EB Garamond sin Rajdhani (algunos manuales)
-    "https://fonts.googleapis.com/css2?family=Cinzel:wght@400;600;700&family=EB+Garamond:ital,wght@0,400;0,500;1,400&display=swap",
-]
-
-
-def check_environment():
-    """Valida dependencias Python, herramientas de sistema y descarga fuentes. Aborta si falta algo."""
-    _check_dependencies()
-    _ensure_fonts()
+import fonts
+
+BASE_DIR         = Path(__file__).parent
+FINGERPRINT_PATH = BASE_DIR / ".env_fingerprint.json"
+
+# Paquete (distribución pip) → módulo que se importa
+REQUIRED_PACKAGES = {
+    "Flask":         "flask",
+    "requests":      "requests",
+    "weasyprint":    "weasyprint",
+    "python-docx":   "docx",
+    "docxtpl":       "docxtpl",
+    "pypandoc":      "pypandoc",
+    "python-dotenv": "dotenv",
+    "markdown":      "markdown",
+}
+
+# Hilo de descarga de fuentes lanzado por check_environment() (None si no hizo falta).
+_fonts_thread: threading.Thread | None = None
+
+
+def check_environment(force: bool = False):
+    """Valida dependencias Python, herramientas de sistema y prepara las fuentes. Aborta si falta algo.
+
+    Arranque rápido: si la huella del entorno (versiones de paquetes + ruta de pandoc)
+    coincide con la del último chequeo correcto, no se importan los renderizadores ni
+    se lanza pandoc. Las fuentes que falten se descargan en segundo plano.
+    force=True (o SAVAGEPY_FORCE_CHECK=1) repite el chequeo completo.
+    """
+    force = force or os.getenv("SAVAGEPY_FORCE_CHECK") == "1"
+    fingerprint = _environment_fingerprint()
+    if force or fingerprint != _load_fingerprint():
+        _check_dependencies()
+        _save_fingerprint(fingerprint)
+    _warm_fonts()
     print("[OK] Entorno listo.\n")
 
 
+def wait_for_fonts(timeout: float | None = 30) -> bool:
+    """Espera a que termine la descarga de fuentes en segundo plano. Devuelve False si vence el timeout."""
+    if _fonts_thread is None:
+        return True
+    _fonts_thread.join(timeout)
+    return not _fonts_thread.is_alive()
+
+
+# ── HUELLA DEL ENTORNO ─────────────────────────────────────────────────────
+
+def _environment_fingerprint() -> dict:
+    """Versiones instaladas (leídas de los metadatos, sin importar nada) y ruta de pandoc."""
+    versions = {}
+    for pkg in REQUIRED_PACKAGES:
+        try:
+            versions[pkg] = importlib.metadata.version(pkg)
+        except importlib.metadata.PackageNotFoundError:
+            versions[pkg] = None
+    return {
+        "python":   sys.version.split()[0],
+        "packages": versions,
+        "pandoc":   shutil.which("pandoc"),
+    }
+
+
+def _load_fingerprint() -> dict | None:
+    try:
+        return json.loads(FINGERPRINT_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _save_fingerprint(fingerprint: dict):
+    try:
+        FINGERPRINT_PATH.write_text(json.dumps(fingerprint, indent=2), encoding="utf-8")
+    except OSError as e:
+        print(f"  [!] No se pudo guardar la huella del entorno: {e}")
+
+
 # ── DEPENDENCIAS ───────────────────────────────────────────────────────────
 
 def _check_dependencies():
-    required = {
-        "Flask":         "flask",
-        "requests":      "requests",
-        "weasyprint":    "weasyprint",
-        "python-docx":   "docx",
-        "docxtpl":       "docxtpl",
-        "pypandoc":      "pypandoc",
-        "python-dotenv": "dotenv",
-        "markdown":      "markdown",
-    }
-    missing = [pkg for pkg, mod in required.items() if not _can_import(mod)]
+    missing = [pkg for pkg, mod in REQUIRED_PACKAGES.items() if not _can_import(mod)]
     if missing:
         print(f"[!] Faltan paquetes Python: {', '.join(missing)}")
         print("    Ejecuta: pip install -r requirements.txt")
@@ -70,37 +115,13 @@ def _can_import(module_name: str) -> bool:
 
 # ── FUENTES ────────────────────────────────────────────────────────────────
 
-def _ensure_fonts():
-    """Descarga todas las fuentes de REQUIRED_FONTS al caché local si no están ya.
-    No modifica ningún template — la sustitución de rutas se hace en memoria al renderizar."""
-    import requests as req
-
-    for url in REQUIRED_FONTS:
-        slug = re.sub(r'[^a-z0-9]', '_', url.lower())[:60]
-        cache_dir = FONTS_CACHE_DIR / slug
-        css_path  = cache_dir / "fonts.css"
-
-        if css_path.exists():
-            continue  # ya está, no hacer nada
-
-        try:
-            cache_dir.mkdir(parents=True, exist_ok=True)
-            css = req.get(url, headers=FONTS_HEADERS, timeout=10).text
-            font_faces = []
-            for face in re.findall(r'(@font-face\s*\{[^}]+\})', css, re.DOTALL):
-                woff_match = re.search(r'url\((https://[^)]+\.woff2)\)', face)
-                if not woff_match:
-                    continue
-                woff_url = woff_match.group(1)
-                fname = woff_url.split("/")[-1].split("?")[0]
-                local_path = cache_dir / fname
-                if not local_path.exists():
-                    local_path.write_bytes(req.get(woff_url, timeout=10).content)
-                    print(f"  ↓ {fname}")
-                face_local = face.replace(woff_url, f"/static/fonts/cache/{slug}/{fname}")
-                face_local = re.sub(r'\s*format\([^)]+\)', '', face_local)
-                font_faces.append(face_local)
-            css_path.write_text("\n\n".join(font_faces), encoding="utf-8")
-            print(f"  [✓] Fuentes cacheadas: {slug}")
-        except Exception as e:
-            print(f"  [!] No se pudieron descargar las fuentes de {url}: {e}")
+def _warm_fonts():
+    """Si los templates piden alguna fuente que no está en static/fonts/, la descarga en un hilo aparte.
+    Con todas las fuentes en local el arranque no toca la red."""
+    global _fonts_thread
+    if not fonts.MERGED_SHEET.exists() or fonts.MERGED_SHEET.stat().st_mtime < fonts.UI_SHEET.stat().st_mtime:
+        fonts.write_merged_sheet()
+    if not fonts.missing_faces():
+        return
+    _fonts_thread = threading.Thread(target=fonts.sync, name="fonts-warmup", daemon=True)
+    _fonts_thread.start()